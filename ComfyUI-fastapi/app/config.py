@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-import uuid
+from functools import lru_cache, cached_property
 import os
 from typing import Optional
 
@@ -7,6 +7,7 @@ from typing import Optional
 comfyui_fastapi_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 DOTENV = os.path.join(comfyui_fastapi_root, ".env")
 
+
 class Settings(BaseSettings):
     """
     Settings for the backend application.
@@ -14,24 +15,25 @@ class Settings(BaseSettings):
     Some settings (e.g. AWS S3) are overridden by the dotenv file.
     """
     # ComfyUI Configuration
-    COMFY_API_HOST: str = os.getenv("COMFY_API_HOST", "127.0.0.1")
-    COMFY_API_PORT: int = int(os.getenv("COMFY_API_PORT", "8188"))
-    COMFY_CLIENT_ID: str = str(uuid.uuid4())  
+    COMFY_API_HOST: str = "127.0.0.1"
+    COMFY_API_PORT: int = 8188
+    COMFY_CLIENT_ID: Optional[str] = None  # If unset, each backend process generates its own
+    COMFY_CLIENT_ID_PERSIST: bool = False  # Keep the generated client ID across restarts. Only for a single backend process per host
     
     # Redis Configuration
-    REDIS_HOST: str = os.getenv("REDIS_HOST", "127.0.0.1")
-    REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
-    REDIS_DB: int = int(os.getenv("REDIS_DB", "0"))
-    TASK_TTL_SECONDS: int = int(os.getenv("TASK_TTL_SECONDS", str(60*60*24*7)))  # 7 days default
+    REDIS_HOST: str = "127.0.0.1"
+    REDIS_PORT: int = 6379
+    REDIS_DB: int = 0
+    TASK_TTL_SECONDS: int = 60*60*24*7  # 7 days default
     
     # AWS S3 Configuration
     AWS_ACCESS_KEY_ID: Optional[str] = None
     AWS_SECRET_ACCESS_KEY: Optional[str] = None
-    AWS_REGION: str =  os.getenv("AWS_REGION", "us-east-1")
+    AWS_REGION: str = "us-east-1"
     S3_BUCKET_NAME: Optional[str] = None
-    S3_PREFIX: str = os.getenv("S3_PREFIX", "images/")
+    S3_PREFIX: str = "images/"
     S3_STORAGE_ENABLED: bool = False
-    LOCAL_IMAGE_CLEANUP_AFTER_UPLOAD: bool = False  # Whether to delete local temporary files after upload
+    LOCAL_IMAGE_CLEANUP_AFTER_UPLOAD: bool = False  # Unused, images are streamed to S3 without temporary files. Kept so existing dotenv files still load
     
     # CloudFront Configuration
     CLOUDFRONT_ENABLED: bool = False
@@ -42,21 +44,30 @@ class Settings(BaseSettings):
     CLOUDFRONT_URL_EXPIRATION: int = 604800  # Signed URL expiration date, 7 days by default
 
     # Proxy Server Webhook Configuration
-    PROXY_WEBHOOK_URL: str = os.getenv("PROXY_WEBHOOK_URL", "")
-    PROXY_WEBHOOK_SECRET: str = os.getenv("PROXY_WEBHOOK_SECRET", "")
+    PROXY_WEBHOOK_URL: str = ""
+    PROXY_WEBHOOK_SECRET: str = ""
     
-    @property
+    @cached_property
     def COMFY_API_URL(self) -> str:
         return f"http://{self.COMFY_API_HOST}:{self.COMFY_API_PORT}"
         
-    @property
+    @cached_property
     def REDIS_URL(self) -> str:
         return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_DB}"
 
     # Dotenv file manages S3 configuration. The AWS configs will be overridden by the dotenv file.
     model_config = SettingsConfigDict(
         env_file=DOTENV,
-        env_file_encoding="utf-8"
+        env_file_encoding="utf-8",
+        frozen=True
     )
 
-settings = Settings() 
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Get the Settings singleton instance.
+    Environment variables and the dotenv file are read once per process.
+    """
+    return Settings()
+
+settings = get_settings()
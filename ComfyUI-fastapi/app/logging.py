@@ -1,12 +1,50 @@
 import logging
-import sys
-from typing import Optional
+import logging.config
 
-def get_logger(name: str = "ComfyUI-fastapi.app") -> logging.Logger:
+LOGGER_NAME = "app"
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+
+def configure_logging(level: str = "INFO") -> None:
+    """
+    Attach a single stream handler to the application logger.
+    Called once on startup; loggers from get_logger() are children of it.
+    
+    Args:
+        level: Log level of the application logger
+    """
+    logging.config.dictConfig({
+        "version": 1,
+        "disable_existing_loggers": False,
+        "formatters": {
+            "default": {"format": LOG_FORMAT}
+        },
+        "handlers": {
+            "console": {
+                "class": "logging.StreamHandler",
+                "formatter": "default"
+            }
+        },
+        "loggers": {
+            LOGGER_NAME: {
+                "handlers": ["console"],
+                "level": level,
+                "propagate": False
+            }
+        }
+    })
+
+
+def get_logger(name: str = LOGGER_NAME) -> logging.Logger:
     """
-    Set up logger.
+    Get a logger under the application logger.
+    
+    Args:
+        name: Logger name, usually the module's __name__
+        
+    Returns:
+        logging.Logger: The logger
     """
-    logger = logging.getLogger(name)
-    return logger
+    return logging.getLogger(name)
 
-logger = get_logger("ComfyUI-fastapi.app") 
\ No newline at end of file
+logger = get_logger()
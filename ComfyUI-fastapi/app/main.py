@@ -1,9 +1,38 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from .routers import generation, workflows, system
+from .responses import ORJSONResponse
+from .logging import configure_logging
+from .workflows.workflow_registry import workflow_registry
+from .workflows.base import close_http_client
+from .services.task_manager import get_task_manager
+from .services.comfy_client import get_comfy_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Configure logging, load workflows and start the webhook workers and the ComfyUI WebSocket on startup, and close them on shutdown.
+    """
+    configure_logging()
+    task_manager = get_task_manager()
+    app.state.task_manager = task_manager
+    await task_manager.ping()
+    await task_manager.start()
+    comfy_client = get_comfy_client()
+    app.state.comfy_client = comfy_client
+    await comfy_client.start()
+    workflow_registry.warm()
+    yield
+    await comfy_client.close()
+    await task_manager.close()
+    close_http_client()
 
 app = FastAPI(title="ComfyUI API Wrapper", 
               description="API for interacting with ComfyUI workflows",
-              version="0.1.0")
+              version="0.1.0",
+              default_response_class=ORJSONResponse,
+              lifespan=lifespan)
 
 app.include_router(generation.router)
 app.include_router(workflows.router)
@@ -18,4 +47,4 @@ async def root():
         "message": "Welcome to ComfyUI API Wrapper",
         "docs_url": "/docs",
         "redoc_url": "/redoc"
-    } 
\ No newline at end of file
+    }
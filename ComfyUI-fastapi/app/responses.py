@@ -0,0 +1,12 @@
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+    Used instead of fastapi.responses.ORJSONResponse, which newer FastAPI versions deprecate.
+    """
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
@@ -1,26 +1,35 @@
-from fastapi import APIRouter, HTTPException, Body, BackgroundTasks, WebSocket, Depends, Request
-from fastapi.responses import JSONResponse
-from fastapi.websockets import WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional, List
-import asyncio
-import time
-import json
-import threading
-from uuid import uuid4
+from typing import Dict, Any, Optional
+import orjson
+import msgspec
 
 from ..workflows.workflow_registry import workflow_registry
-from ..exceptions import WorkflowNotFoundError, WorkflowValidationError, WorkflowModificationError
-from ..services.task_manager import Task, get_task_manager, TaskStatus as Status
-from ..services.comfy_client import get_comfy_client
-from ..config import settings
+from ..exceptions import WorkflowNotFoundError, WorkflowModificationError
+from ..services.task_manager import TaskManager, TaskStatus as Status
+from ..services.comfy_client import ComfyUIClient
 from ..logging import get_logger
+from ..responses import ORJSONResponse
 
-logger = get_logger()
+logger = get_logger(__name__)
 
 router = APIRouter(prefix="/generation", tags=["generation"])
-task_manager = get_task_manager()
-comfy_client = get_comfy_client()
+
+STATUS_MESSAGES = {
+    Status.COMPLETED.value: "Task completed successfully",
+    Status.PROCESSING.value: "Task is currently processing",
+    Status.QUEUED.value: "Task is queued and waiting to be processed"
+}
+
+def get_app_task_manager(request: Request) -> TaskManager:
+    """Get the TaskManager created in the app lifespan"""
+    return request.app.state.task_manager
+
+def get_app_comfy_client(request: Request) -> ComfyUIClient:
+    """Get the ComfyUIClient started in the app lifespan"""
+    return request.app.state.comfy_client
 
 class GenerationRequest(BaseModel):
     """Request model for workflow generation."""
@@ -54,6 +63,13 @@ class GenerationRequest(BaseModel):
             }
         }
 
+class GenerationPayload(msgspec.Struct):
+    """Request body of /generation, decoded with msgspec. GenerationRequest documents the same body in OpenAPI."""
+    workflow_name: str
+    modifications: Dict[str, Dict[str, Any]]
+
+_generation_payload_decoder = msgspec.json.Decoder(GenerationPayload)
+
 class TaskResponse(BaseModel):
     """Response model for task creation and status."""
     task_id: str = Field(..., description="Unique ID for tracking the task")
@@ -73,45 +89,64 @@ class TaskResponse(BaseModel):
             }
         }
 
-@router.post("", summary="Queue a workflow for generation", response_model=TaskResponse)
+@router.post(
+    "", 
+    summary="Queue a workflow for generation", 
+    response_model=None, 
+    responses={200: {"model": TaskResponse}},
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": GenerationRequest.model_json_schema()}}
+        }
+    }
+)
 async def generate(
-    request: GenerationRequest = Body(..., description="Generation request parameters")
+    http_request: Request,
+    task_manager: TaskManager = Depends(get_app_task_manager),
+    comfy_client: ComfyUIClient = Depends(get_app_comfy_client)
 ):
     """
     Queue a workflow for generation.
     Creates a task and queues the workflow with ComfyUI, then returns immediately.
     
     Args:
-        request: The generation request containing workflow name and modifications
+        http_request: The raw request. Its JSON body (see GenerationRequest) is decoded with msgspec
     
     Returns:
         Task information with ID for tracking progress
     """
+    try:
+        request = _generation_payload_decoder.decode(await http_request.body())
+    except (msgspec.ValidationError, msgspec.DecodeError) as e:
+        # Same error shape FastAPI returns when it validates the body itself
+        raise RequestValidationError([{"type": "value_error", "loc": ("body",), "msg": str(e), "input": None}])
+    
     try:
         logger.info(f"Queuing workflow: {request.workflow_name}")
         
-        task = task_manager.create_task(request.workflow_name, request.modifications)  # hold entire workflow
+        task = await task_manager.create_task(request.workflow_name, request.modifications)  # hold entire workflow
                 
         try:
             workflow = workflow_registry.get_workflow(request.workflow_name)
             modified_workflow = workflow.update_workflow(request.modifications)
             
-            prompt_id = comfy_client.queue_prompt(modified_workflow, task.id)
+            prompt_id = await comfy_client.queue_prompt(modified_workflow, task.id)
             logger.info(f"Task queued with Prompt ID: {prompt_id}, Task ID: {task.id}")
             
-            task_manager.update_prompt_id(task.id, prompt_id)
-            task_manager.update_task_status(task.id, Status.PROCESSING.value)
+            await task_manager.update_prompt_id(task.id, prompt_id)
+            await task_manager.update_task_status(task.id, Status.PROCESSING.value)
             
-            return {
+            return ORJSONResponse({
                 "task_id": task.id,
                 "status": "queued",
                 "progress": 0,
                 "message": "Workflow successfully queued. Use the /generation/tasks/{task_id} endpoint to track progress."
-            }
+            })
             
         except WorkflowNotFoundError:
             logger.error(f"Workflow {request.workflow_name} not found")
-            task_manager.update_task_status(
+            await task_manager.update_task_status(
                 task.id, 
                 Status.FAILED.value, 
                 {"error": f"Workflow '{request.workflow_name}' not found"}
@@ -122,7 +157,7 @@ async def generate(
             )
         except WorkflowModificationError as e:
             logger.error(f"Error modifying workflow: {e}")
-            task_manager.update_task_status(
+            await task_manager.update_task_status(
                 task.id, 
                 Status.FAILED.value, 
                 {"error": f"Error modifying workflow: {str(e)}"}
@@ -131,6 +166,8 @@ async def generate(
                 status_code=400, 
                 detail=f"Error modifying workflow: {str(e)}"
             )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating output: {e}")
         raise HTTPException(
@@ -138,8 +175,13 @@ async def generate(
             detail=f"Error generating output: {str(e)}"
         )
 
-@router.get("/tasks/{task_id}", summary="Get task status", response_model=TaskResponse)
-async def get_task_status(task_id: str):
+@router.get(
+    "/tasks/{task_id}", 
+    summary="Get task status", 
+    response_model=None, 
+    responses={200: {"model": TaskResponse}}
+)
+async def get_task_status(task_id: str, task_manager: TaskManager = Depends(get_app_task_manager)):
     """
     Get the current status of a task.
     
@@ -149,7 +191,7 @@ async def get_task_status(task_id: str):
     Returns:
         Task information including status, progress, and results if completed
     """
-    task = task_manager.get_task(task_id)
+    task = await task_manager.get_task_view(task_id)
     
     if not task:
         raise HTTPException(
@@ -158,41 +200,47 @@ async def get_task_status(task_id: str):
         )
     
     response = {
-        "task_id": task.id,
-        "status": task.status,
-        "progress": task.progress
+        "task_id": task_id,
+        "status": task["status"],
+        "progress": task["progress"]
     }
     
-    if task.status == Status.COMPLETED.value and task.result:
-        response["result"] = task.result
-        response["message"] = "Task completed successfully"
-    elif task.status == Status.FAILED.value and task.result and "error" in task.result:
-        response["message"] = task.result["error"]
-    elif task.status == Status.PROCESSING.value:
-        response["message"] = "Task is currently processing"
-    elif task.status == Status.QUEUED.value:
-        response["message"] = "Task is queued and waiting to be processed"
+    status = task["status"]
+    result = task["result"]
+    if status == Status.COMPLETED.value:
+        if result:
+            response["result"] = result
+            response["message"] = STATUS_MESSAGES[status]
+    elif status == Status.FAILED.value:
+        if result and "error" in result:
+            response["message"] = result["error"]
+    elif status in STATUS_MESSAGES:
+        response["message"] = STATUS_MESSAGES[status]
     
-    return response 
+    return ORJSONResponse(response)
 
 @router.get("/tasks", summary="List all tasks")
-async def list_tasks():
+async def list_tasks(task_manager: TaskManager = Depends(get_app_task_manager)):
     """
     Get a list of all tasks.
+    The list is streamed as a JSON array while tasks are read from Redis in batches.
     
     Returns:
         List of all tasks with their status
     """
-    tasks = task_manager.get_all_tasks()
+    async def stream_tasks():
+        yield b"["
+        separator = b""
+        async for task in task_manager.iter_tasks():
+            yield separator + orjson.dumps({
+                "task_id": task.id,
+                "workflow_name": task.workflow_name,
+                "status": task.status,
+                "progress": task.progress,
+                "created_at": task.created_at.isoformat(),
+                "updated_at": task.updated_at.isoformat()
+            })
+            separator = b","
+        yield b"]"
     
-    return [
-        {
-            "task_id": task.id,
-            "workflow_name": task.workflow_name,
-            "status": task.status,
-            "progress": task.progress,
-            "created_at": task.created_at.isoformat(),
-            "updated_at": task.updated_at.isoformat()
-        }
-        for task in tasks
-    ] 
\ No newline at end of file
+    return StreamingResponse(stream_tasks(), media_type="application/json")
@@ -1,10 +1,14 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 from pydantic import BaseModel, Field
 from typing import Literal
 
 router = APIRouter(
     tags=["system"],
 )
+
+# The health response never changes, so it is kept as pre-encoded JSON bytes
+_HEALTHY = b'{"status":"healthy"}'
+
 class HealthResponse(BaseModel):
     """Response model for health check endpoint."""
     status: Literal["healthy", "unhealthy"] = Field(..., description="Current health status of the API")
@@ -12,9 +16,9 @@ class HealthResponse(BaseModel):
 @router.get(
     "/health", 
     summary="Health check",
-    response_model=HealthResponse,
+    response_model=None,
     responses={
-        200: {"description": "API is healthy and running normally"}
+        200: {"description": "API is healthy and running normally", "model": HealthResponse}
     }
 )
 async def health_check():
@@ -22,4 +26,4 @@ async def health_check():
     Simple health check endpoint to verify the API is running.
     Returns a status indicating the health of the API.
     """
-    return HealthResponse(status="healthy") 
\ No newline at end of file
+    return Response(content=_HEALTHY, media_type="application/json") 
\ No newline at end of file
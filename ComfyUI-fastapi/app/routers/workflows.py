@@ -3,6 +3,7 @@ from pydantic import BaseModel, Field
 from typing import Dict, Any, List
 from ..workflows.workflow_registry import workflow_registry
 from ..exceptions import WorkflowNotFoundError
+from ..responses import ORJSONResponse
 
 router = APIRouter(
     prefix="/workflows",
@@ -26,9 +27,9 @@ class WorkflowsListResponse(BaseModel):
 @router.get(
     "/{name}/nodes", 
     summary="Get workflow nodes in normalized format",
-    response_model=WorkflowNodesResponse,
+    response_model=None,
     responses={
-        200: {"description": "Successful response with workflow nodes"},
+        200: {"description": "Successful response with workflow nodes", "model": WorkflowNodesResponse},
         404: {"description": "Workflow not found"}
     }
 )
@@ -43,24 +44,16 @@ async def get_workflow_nodes(
     try:
         workflow_registry.load_workflows()
         workflow = workflow_registry.get_workflow(name)
-        return WorkflowNodesResponse(
-            nodes={
-                node_id: WorkflowNode(
-                    class_type=node["class_type"] if "class_type" in node else "",
-                    inputs=node.get("inputs", {})
-                )
-                for node_id, node in workflow.workflow.items()
-            }
-        )
+        return ORJSONResponse({"nodes": workflow.nodes_view})
     except WorkflowNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 @router.get(
     "", 
     summary="List available workflows",
-    response_model=WorkflowsListResponse,
+    response_model=None,
     responses={
-        200: {"description": "Successful response with list of workflows"}
+        200: {"description": "Successful response with list of workflows", "model": WorkflowsListResponse}
     }
 )
 async def list_workflows():
@@ -69,4 +62,4 @@ async def list_workflows():
     """
     workflow_registry.load_workflows()
     workflows = workflow_registry.get_workflow_names()
-    return WorkflowsListResponse(workflows=workflows)
\ No newline at end of file
+    return ORJSONResponse({"workflows": workflows})
\ No newline at end of file
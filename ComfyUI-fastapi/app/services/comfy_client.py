@@ -1,20 +1,51 @@
-import json
-import urllib.request
+import orjson
+import os
 import urllib.parse
 import uuid
-import websocket
-import threading
+import aiohttp
+import asyncio
 import logging
 import functools
+import random
 import time
-from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Set
 
 from ..config import settings
 from ..logging import get_logger
 from ..services.task_manager import get_task_manager, TaskStatus
 from ..services.s3_service import get_s3_service
 
-logger = get_logger()
+logger = get_logger(__name__)
+
+PROMPT_CACHE_SIZE = 1024
+UPLOAD_WORKERS = 4
+# Progress of running prompts is written to Redis in batches at this interval, in seconds
+PROGRESS_FLUSH_INTERVAL = 0.2
+CLIENT_ID_FILE = os.path.join(os.path.expanduser("~"), ".cache", "comfy-backend", "client_id")
+
+
+def _persistent_client_id() -> str:
+    """
+    Get the ComfyUI client ID saved by a previous run, or generate and save a new one.
+    Falls back to an unsaved ID if the cache directory is not writable.
+    """
+    try:
+        with open(CLIENT_ID_FILE, "r", encoding="utf-8") as f:
+            client_id = f.read().strip()
+        if client_id:
+            return client_id
+    except OSError:
+        pass
+    
+    client_id = str(uuid.uuid4())
+    try:
+        os.makedirs(os.path.dirname(CLIENT_ID_FILE), exist_ok=True)
+        with open(CLIENT_ID_FILE, "w", encoding="utf-8") as f:
+            f.write(client_id)
+    except OSError:
+        pass
+    return client_id
 
 class ComfyUIClient:
     """
@@ -23,175 +54,279 @@ class ComfyUIClient:
     """
     
     def __init__(self):
-        """Initialize the ComfyUI client with a WebSocket connection to track progress."""
+        """Initialize the ComfyUI client. The WebSocket connection is opened by start()."""
         self.server_address = f"{settings.COMFY_API_HOST}:{settings.COMFY_API_PORT}"
-        self.client_id = settings.COMFY_CLIENT_ID or str(uuid.uuid4())
+        self._view_url = f"http://{self.server_address}/view?"
+        # Resolved by start() when not configured, so creating the client touches no files
+        self.client_id: Optional[str] = settings.COMFY_CLIENT_ID
         self.task_manager = get_task_manager()
         self.s3_service = get_s3_service()
-        self.ws = None
+        # prompt_id -> task_id of prompts still running, so progress messages skip the Redis lookup
+        self._prompt_tasks: Dict[str, str] = {}
+        # prompt_id -> last stored progress, to skip writes that would not change the percentage
+        self._last_progress: Dict[str, int] = {}
+        # task_id -> latest progress not yet written to Redis
+        self._pending_progress: Dict[str, int] = {}
+        self._progress_lock: Optional[asyncio.Lock] = None
+        self._progress_task: Optional[asyncio.Task] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._ws_task: Optional[asyncio.Task] = None
+        # Completion handlers run as tasks so uploads don't hold up the next messages
+        self._completion_tasks: Set[asyncio.Task] = set()
+        self._upload_pool: Optional[ThreadPoolExecutor] = None
+        self._handlers = {
+            'progress': self._handle_progress,
+            'executing': self._handle_executing,
+            'status': self._handle_status
+        }
         self.is_connected = False
-        self.reconnect_needed = True
         self.reconnect_delay = 5 
         self.max_reconnect_delay = 60  
-        
-        # Start WebSocket connection in a background thread
-        self._start_websocket()
+        # Backoff only resets after a connection stayed up for a full backoff window, so flapping links back off too
+        self._reconnect_backoff = self.reconnect_delay
+        self._connected_at: Optional[float] = None
+    
+    async def start(self):
+        """
+        Open the pooled HTTP session and start the WebSocket connection in a background task on the running event loop.
+        The session is shared by the WebSocket and the ComfyUI HTTP calls, so connections are kept alive between prompts.
+        """
+        if not self.client_id:
+            # ComfyUI only keeps the newest socket of a client ID, so a saved ID must not be shared by several processes
+            self.client_id = _persistent_client_id() if settings.COMFY_CLIENT_ID_PERSIST else str(uuid.uuid4())
+        self._session = aiohttp.ClientSession()
+        # Dedicated threads for image downloads and S3 uploads, so they can't starve the default executor.
+        # This is the only upload parallelism, S3Service uploads the images of a prompt one after another
+        self._upload_pool = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="comfy-upload")
+        self._progress_lock = asyncio.Lock()
+        self._progress_task = asyncio.create_task(self._progress_loop())
+        self._ws_task = asyncio.create_task(self._ws_loop())
         logger.info(f"Websocket connection started for {self.server_address}")
     
-    def _start_websocket(self):
-        """Start a WebSocket connection in a background thread."""
-        def websocket_thread():
-            while True:
-                if not self.reconnect_needed:
-                    time.sleep(1)
-                    continue
-                    
-                try:
-                    ws_url = f"ws://{self.server_address}/ws?clientId={self.client_id}"
-                    logger.info(f"Connecting to ComfyUI WebSocket at {ws_url}")
-                    
-                    # Create WebSocket connection with ping/pong for keepalive
-                    self.ws = websocket.WebSocketApp(
-                        ws_url,
-                        on_open=self._on_ws_open,
-                        on_message=self._on_ws_message,
-                        on_error=self._on_ws_error,
-                        on_close=self._on_ws_close,
-                        on_ping=self._on_ws_ping,
-                        on_pong=self._on_ws_pong
-                    )
-                    
-                    # Reset reconnect delay on successful connection
-                    self.reconnect_needed = False
-                    
-                    # Enable ping/pong to keep the connection alive
-                    self.ws.run_forever(ping_interval=30, ping_timeout=10)
+    async def close(self):
+        """Stop the WebSocket task and wait for running completion handlers."""
+        if self._ws_task:
+            self._ws_task.cancel()
+            await asyncio.gather(self._ws_task, return_exceptions=True)
+            self._ws_task = None
+        if self._progress_task:
+            self._progress_task.cancel()
+            await asyncio.gather(self._progress_task, return_exceptions=True)
+            self._progress_task = None
+        await self._flush_progress()
+        if self._completion_tasks:
+            await asyncio.gather(*self._completion_tasks, return_exceptions=True)
+        if self._upload_pool:
+            self._upload_pool.shutdown(wait=False)
+            self._upload_pool = None
+        if self._session:
+            await self._session.close()
+            self._session = None
+        self.is_connected = False
+    
+    async def _ws_loop(self):
+        """Keep a WebSocket connection to ComfyUI open, reconnecting with jittered exponential backoff."""
+        ws_url = f"ws://{self.server_address}/ws?clientId={self.client_id}"
+        while True:
+            try:
+                logger.info(f"Connecting to ComfyUI WebSocket at {ws_url}")
+                
+                # Heartbeat pings keep the connection alive, preview images can exceed the default size limit
+                async with self._session.ws_connect(ws_url, heartbeat=30, max_msg_size=0) as ws:
+                    await self._on_ws_open(ws)
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            await self._on_ws_message(msg.data)
+                        elif msg.type == aiohttp.WSMsgType.BINARY:
+                            logger.debug("Received binary data (likely image)")
+                        elif msg.type == aiohttp.WSMsgType.ERROR:
+                            logger.error(f"WebSocket error: {ws.exception()}")
+                            break
                     
-                    if self.reconnect_needed:
-                        delay = min(self.reconnect_delay, self.max_reconnect_delay)
-                        logger.warning(f"WebSocket connection closed, reconnecting in {delay} seconds...")
-                        time.sleep(delay)
-                        # Increase delay for next attempt with exponential backoff
-                        self.reconnect_delay = min(self.reconnect_delay * 1.5, self.max_reconnect_delay)
-                except Exception as e:
-                    logger.error(f"Error in WebSocket thread: {e}")
-                    delay = min(self.reconnect_delay, self.max_reconnect_delay)
-                    time.sleep(delay)
-                    # Increase delay for next attempt with exponential backoff
-                    self.reconnect_delay = min(self.reconnect_delay * 1.5, self.max_reconnect_delay)
-                    self.reconnect_needed = True
+                    logger.warning(f"WebSocket connection closed (code: {ws.close_code})")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in WebSocket connection: {e}")
+            
+            self.is_connected = False
+            # ComfyUI sends a status frame on every connect, so only the uptime tells a healthy connection apart
+            if self._connected_at is not None and time.monotonic() - self._connected_at >= self.max_reconnect_delay:
+                self._reconnect_backoff = self.reconnect_delay
+            self._connected_at = None
+            # Decorrelated jitter keeps replicas out of lockstep, and never retries sooner than reconnect_delay
+            delay = min(self.max_reconnect_delay, random.uniform(self.reconnect_delay, self._reconnect_backoff * 3))
+            self._reconnect_backoff = delay
+            logger.warning(f"Reconnecting to ComfyUI WebSocket in {delay:.1f} seconds...")
+            await asyncio.sleep(delay)
+    
+    async def _progress_loop(self):
+        """Periodically write the buffered progress updates to Redis."""
+        while True:
+            await asyncio.sleep(PROGRESS_FLUSH_INTERVAL)
+            try:
+                await self._flush_progress()
+            except Exception as e:
+                logger.error(f"Error flushing task progress: {e}")
+    
+    async def _flush_progress(self):
+        """Write the latest buffered progress of every task in one Redis round-trip."""
+        if not self._pending_progress:
+            return
+        # Flushes are serialized, so an older batch can't land after a newer one
+        async with self._progress_lock:
+            pending, self._pending_progress = self._pending_progress, {}
+            if pending:
+                await self.task_manager.update_tasks_progress(pending)
+    
+    def _cache_prompt_task(self, prompt_id: str, task_id: str):
+        """Remember which task a prompt belongs to, dropping the oldest entry when the cache is full."""
+        if len(self._prompt_tasks) >= PROMPT_CACHE_SIZE:
+            oldest_prompt_id = next(iter(self._prompt_tasks))
+            self._prompt_tasks.pop(oldest_prompt_id)
+            self._last_progress.pop(oldest_prompt_id, None)
+        self._prompt_tasks[prompt_id] = task_id
+    
+    async def _get_task_id(self, prompt_id: str) -> Optional[str]:
+        """Get the task ID for a prompt, falling back to Redis when it is not cached."""
+        task_id = self._prompt_tasks.get(prompt_id)
+        if task_id is not None:
+            return task_id
         
-        # Start the thread
-        thread = threading.Thread(target=websocket_thread, daemon=True)
-        thread.start()
+        task = await self.task_manager.get_task_by_prompt_id(prompt_id)
+        if not task:
+            return None
+        self._cache_prompt_task(prompt_id, task.id)
+        return task.id
     
-    def _on_ws_open(self, ws):
+    async def _on_ws_open(self, ws: aiohttp.ClientWebSocketResponse):
         """Called when WebSocket connection is established."""
         logger.info("WebSocket connection established with ComfyUI")
         self.is_connected = True
-        self.reconnect_delay = 5  
+        self._connected_at = time.monotonic()
         
         # Subscribe to events
-        ws.send(json.dumps({
+        await ws.send_str(orjson.dumps({
             "type": "subscribe",
-            "data": {"events": ["progress", "executing", "execution_cached"]}
-        }))
-    
-    def _on_ws_ping(self, ws, message):
-        """Handle ping from server."""
-        logger.debug("Received ping from server")
+            "data": {"events": ["progress", "executing"]}
+        }).decode())
     
-    def _on_ws_pong(self, ws, message):
-        """Handle pong from server."""
-        logger.debug("Received pong from server")
-    
-    def _on_ws_message(self, ws, message):
+    async def _on_ws_message(self, message: str):
         """
         Process WebSocket messages and update task status in Redis.
         This is the callback that actually tracks the progress of the workflow.
         """
+        # ComfyUI messages are JSON objects, and only progress and executing messages update tasks
+        if not message.startswith('{'):
+            return
+        if (
+            '"progress"' not in message 
+            and '"executing"' not in message 
+            and not logger.isEnabledFor(logging.DEBUG)
+        ):
+            return
+        
         try:
-            # Handle binary data (images)
-            if not isinstance(message, str):
-                logger.debug("Received binary data (likely image)")
-                return
-                
-            data = json.loads(message)
-            message_type = data.get('type')
-            
+            data = orjson.loads(message)
+        except orjson.JSONDecodeError as e:
+            logger.warning(f"Ignoring malformed WebSocket message: {e}")
+            return
+        
+        message_type = data.get('type')
+        if logger.isEnabledFor(logging.DEBUG):
             logger.debug(f"Received message type: {message_type}")
-            
-            if message_type == 'progress':
-                msg_data = data['data']
-                prompt_id = msg_data.get('prompt_id')
-                
-                if not prompt_id:
-                    logger.debug("No prompt_id in progress message")
-                    return
-                
-                task = self.task_manager.get_task_by_prompt_id(prompt_id)
-                if not task:
-                    logger.debug(f"No task found for prompt_id {prompt_id}")
-                    return
-                
-                progress = int((msg_data['value'] / msg_data['max']) * 100)
-                self.task_manager.update_task_progress(task.id, progress)
-                logger.debug(f"Updated progress for task {task.id}: {progress}%")
-                
-            # Handle execution completed
-            elif message_type == 'executing':
-                msg_data = data['data']
-                prompt_id = msg_data.get('prompt_id')
-                
-                if not prompt_id:
-                    return
-                
-                task = self.task_manager.get_task_by_prompt_id(prompt_id)
-                if not task:
-                    logger.debug(f"No task found for prompt_id {prompt_id}")
-                    return
-                
-                # If node is None, execution is complete
-                if msg_data['node'] is None:
-                    logger.info(f"Execution complete for prompt {prompt_id}, task {task.id}")
-                    
-                    history = self.get_history(prompt_id)
-                    if history and prompt_id in history:
-                        output_images = self.get_images(prompt_id)
-                        
-                        if output_images:
-                            # Get S3 service and process images (if enabled)
-                            processed_images = self.s3_service.process_comfyui_images(prompt_id, output_images)
-                            
-                            self.task_manager.update_task_result(task.id, processed_images)
-                            logger.info(f"Added {sum(len(images) for images in processed_images.values())} result images to task {task.id}")
-                        
-                        self.task_manager.update_task_status(task.id, TaskStatus.COMPLETED.value)
-                        logger.info(f"Task {task.id} marked as completed")
-            
-            elif message_type == 'status':
-                logger.debug(f"Received status update: {data.get('data', {})}")
-                
+        
+        handler = self._handlers.get(message_type)
+        if handler is None:
+            return
+        
+        try:
+            await handler(data.get('data', {}))
+        except (KeyError, TypeError) as e:
+            logger.warning(f"Ignoring {message_type} message with unexpected data: {e}")
         except Exception as e:
+            # Never let a single message stop the reader
             logger.error(f"Error processing WebSocket message: {e}")
-            logger.exception("Detailed error information:")
+            logger.debug("Detailed error information:", exc_info=True)
     
-    def _on_ws_error(self, ws, error):
-        """Handle WebSocket errors."""
-        logger.error(f"WebSocket error: {error}")
-        self.is_connected = False
+    async def _handle_progress(self, msg_data: Dict[str, Any]):
+        """Store the progress of a sampler step for the task of the prompt."""
+        prompt_id = msg_data.get('prompt_id')
+        if not prompt_id:
+            logger.debug("No prompt_id in progress message")
+            return
+        
+        task_id = await self._get_task_id(prompt_id)
+        if not task_id:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"No task found for prompt_id {prompt_id}")
+            return
+        
+        # value and max are step counts, integer math is enough
+        value, maximum = msg_data['value'], msg_data['max']
+        progress = int(value * 100 // maximum) if maximum else 0
+        if self._last_progress.get(prompt_id) == progress:
+            return
+        self._last_progress[prompt_id] = progress
+        # Sampler steps arrive in quick succession, only the latest value per flush interval is written
+        self._pending_progress[task_id] = progress
+        if value >= maximum:
+            await self._flush_progress()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Buffered progress for task {task_id}: {progress}%")
     
-    def _on_ws_close(self, ws, close_status_code, close_msg):
-        """Handle WebSocket connection closure."""
-        logger.warning(f"WebSocket connection closed: {close_msg} (code: {close_status_code})")
-        self.is_connected = False
-        self.reconnect_needed = True
+    async def _handle_executing(self, msg_data: Dict[str, Any]):
+        """Start completing the task once the prompt finished executing."""
+        prompt_id = msg_data.get('prompt_id')
+        
+        # If node is None, execution is complete. Other executing messages only announce the next node
+        if not prompt_id or msg_data.get('node') is not None:
+            return
+        
+        task_id = await self._get_task_id(prompt_id)
+        if not task_id:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"No task found for prompt_id {prompt_id}")
+            return
         
-        # Schedule an immediate reconnection, don't wait for the reconnect loop
-        if self.ws:
-            self.ws.close()
+        logger.info(f"Execution complete for prompt {prompt_id}, task {task_id}")
+        await self._flush_progress()
+        completion = asyncio.create_task(self._complete_prompt(prompt_id, task_id))
+        self._completion_tasks.add(completion)
+        completion.add_done_callback(self._completion_tasks.discard)
     
-    def queue_prompt(self, prompt, task_id=None):
+    async def _handle_status(self, msg_data: Dict[str, Any]):
+        """Log ComfyUI queue status updates."""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Received status update: {msg_data}")
+    
+    async def _complete_prompt(self, prompt_id: str, task_id: str):
+        """Collect the output images of a finished prompt, upload them and mark the task as completed."""
+        try:
+            history = await self.get_history(prompt_id)
+            if history and prompt_id in history:
+                output_images = await self.get_images(prompt_id, history)
+                
+                if output_images:
+                    # Image downloads and S3 uploads are blocking, keep them off the event loop
+                    processed_images = await asyncio.get_running_loop().run_in_executor(
+                        self._upload_pool, self.s3_service.process_comfyui_images, prompt_id, output_images
+                    )
+                    
+                    await self.task_manager.update_task_result(task_id, processed_images)
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info(f"Added {sum(map(len, processed_images.values()))} result images to task {task_id}")
+                
+                await self.task_manager.update_task_status(task_id, TaskStatus.COMPLETED.value)
+                logger.info(f"Task {task_id} marked as completed")
+        except Exception as e:
+            logger.error(f"Error completing task {task_id} for prompt {prompt_id}: {e}")
+            logger.debug("Detailed error information:", exc_info=True)
+        finally:
+            self._prompt_tasks.pop(prompt_id, None)
+            self._last_progress.pop(prompt_id, None)
+    
+    async def queue_prompt(self, prompt, task_id=None):
         """
         Queue a prompt for execution on ComfyUI.
         
@@ -202,10 +337,9 @@ class ComfyUIClient:
         Returns:
             str: Prompt ID from ComfyUI
         """
-        # Ensure we have a WebSocket connection
+        # Progress is only tracked while the WebSocket is connected
         if not self.is_connected:
-            logger.warning("WebSocket not connected, trying to reconnect")
-            self.reconnect_needed = True
+            logger.warning("WebSocket not connected, progress updates may be missed until it reconnects")
         
         payload = {
             "prompt": prompt,
@@ -213,17 +347,19 @@ class ComfyUIClient:
         }
         
         headers = {'Content-Type': 'application/json'}
-        data = json.dumps(payload).encode('utf-8')
+        data = orjson.dumps(payload)
         
         try:
-            req = urllib.request.Request(
+            async with self._session.post(
                 f"http://{self.server_address}/prompt",
                 data=data,
                 headers=headers
-            )
-            with urllib.request.urlopen(req) as response:
-                result = json.loads(response.read())
+            ) as response:
+                response.raise_for_status()
+                result = orjson.loads(await response.read())
                 prompt_id = result['prompt_id']
+                if task_id:
+                    self._cache_prompt_task(prompt_id, task_id)
                 
                 if task_id:
                     logger.info(f"Queued prompt {prompt_id} for task {task_id}")
@@ -235,11 +371,12 @@ class ComfyUIClient:
             logger.error(f"Error queueing prompt: {e}")
             raise
     
-    def get_history(self, prompt_id):
+    async def get_history(self, prompt_id):
         """Get execution history for a prompt_id."""
         try:
-            with urllib.request.urlopen(f"http://{self.server_address}/history/{prompt_id}") as response:
-                return json.loads(response.read())
+            async with self._session.get(f"http://{self.server_address}/history/{prompt_id}") as response:
+                response.raise_for_status()
+                return orjson.loads(await response.read())
         except Exception as e:
             logger.error(f"Error getting history: {e}")
             return None
@@ -257,12 +394,8 @@ class ComfyUIClient:
             Dict with image information including URL
         """
         try:
-            params = {
-                "filename": filename,
-                "subfolder": subfolder,
-                "type": filetype
-            }
-            url = f"http://{self.server_address}/view?{urllib.parse.urlencode(params)}"
+            query = urllib.parse.urlencode((("filename", filename), ("subfolder", subfolder), ("type", filetype)))
+            url = self._view_url + query
             
             return {
                 "filename": filename,
@@ -274,43 +407,40 @@ class ComfyUIClient:
             logger.error(f"Error getting image URL: {e}")
             return {"error": str(e)}
     
-    def get_images(self, prompt_id: str) -> Dict[str, List[Dict[str, str]]]:
+    async def get_images(
+        self, 
+        prompt_id: str, 
+        history_data: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, List[Dict[str, str]]]:
         """
         Get all output images for a completed prompt.
         
         Args:
             prompt_id: The prompt ID to get images for
+            history_data: History already fetched with get_history, fetched here if not given
             
         Returns:
             Dictionary mapping node IDs to lists of image data
         """
         try:
             # Get the images from the execution history
-            history_data = self.get_history(prompt_id)
+            if history_data is None:
+                history_data = await self.get_history(prompt_id)
             if not history_data or prompt_id not in history_data:
                 logger.error(f"No history found for prompt {prompt_id}")
                 return {}
             
-            history = history_data[prompt_id]
             output_images = {}
-            
-            for node_id in history.get('outputs', {}):
-                node_output = history['outputs'][node_id]
-                images_output = []
-                
-                if 'images' in node_output:
-                    for image in node_output['images']:
-                        image_data = self._get_image(
-                            image['filename'], 
-                            image['subfolder'], 
-                            image['type']
-                        )
-                        images_output.append(image_data)
-                
+            for node_id, node_output in history_data[prompt_id].get('outputs', {}).items():
+                images_output = [
+                    self._get_image(image['filename'], image['subfolder'], image['type'])
+                    for image in node_output.get('images', ())
+                ]
                 if images_output:
                     output_images[node_id] = images_output
             
-            logger.info(f"Retrieved {sum(len(images) for images in output_images.values())} images for prompt {prompt_id}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"Retrieved {sum(map(len, output_images.values()))} images for prompt {prompt_id}")
             return output_images
         except Exception as e:
             logger.error(f"Error getting images for prompt {prompt_id}: {e}")
@@ -323,13 +453,10 @@ def get_comfy_client() -> ComfyUIClient:
     Get the ComfyUIClient singleton instance.
     
     This function uses lru_cache to ensure only one instance is created.
+    The WebSocket connection retries until ComfyUI is up, so there is no need to wait for it here.
     
     Returns:
         ComfyUIClient: The singleton instance
     """
-    #  Wait for ComfyUI to start
-    time.sleep(5)
     return ComfyUIClient()
-
-get_comfy_client()
         
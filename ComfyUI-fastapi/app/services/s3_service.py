@@ -1,16 +1,17 @@
 import os
 import logging
-from typing import Dict, Optional, List, Any, Tuple
+from typing import Dict, Optional, List
 import mimetypes
-import uuid
-from urllib.parse import urljoin
+import secrets
 import functools
 import json
-import tempfile
 import traceback
 import datetime
+import urllib3
 # AWS S3
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 # AWS CloudFront signed URLs
 from cryptography.hazmat.backends import default_backend
@@ -22,7 +23,45 @@ from botocore.signers import CloudFrontSigner
 from ..config import settings
 from ..logging import get_logger
 
-logger = get_logger()
+logger = get_logger(__name__)
+
+# Keep-alive connection pool shared by all uploads of the singleton client
+S3_CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    retries={"mode": "adaptive"},
+    tcp_keepalive=True,
+    s3={"addressing_style": "virtual"}
+)
+# Large generated images are uploaded as parallel multipart chunks
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=16,
+    use_threads=True
+)
+# Images below the multipart threshold go up in a single PUT, extra transfer threads would only add overhead
+S3_SINGLE_PART_CONFIG = TransferConfig(
+    multipart_threshold=S3_TRANSFER_CONFIG.multipart_threshold,
+    use_threads=False
+)
+# Images are uploaded one at a time per caller, ComfyUIClient runs a few callers in parallel
+VIEW_POOL_SIZE = 4
+# A stalled /view response must not hold an image worker forever
+VIEW_TIMEOUT = urllib3.Timeout(connect=5.0, read=30.0)
+VIEW_RETRIES = urllib3.Retry(total=2, backoff_factor=0.5, redirect=False)
+# Keep-alive connections to the ComfyUI /view endpoint, one per concurrent caller
+_HTTP_POOL = urllib3.PoolManager(num_pools=4, maxsize=VIEW_POOL_SIZE, timeout=VIEW_TIMEOUT, retries=VIEW_RETRIES)
+
+@functools.lru_cache(maxsize=32)
+def _content_type(extension: str) -> str:
+    """Get the content type for a file extension. ComfyUI only outputs a handful of extensions, so this is cached"""
+    return mimetypes.guess_type(f"file{extension}")[0] or 'application/octet-stream'
+
+def _transfer_config(size: Optional[int]) -> TransferConfig:
+    """Get the transfer config for an upload of the given size in bytes, None if unknown"""
+    if size is not None and size < S3_TRANSFER_CONFIG.multipart_threshold:
+        return S3_SINGLE_PART_CONFIG
+    return S3_TRANSFER_CONFIG
 
 class S3Service:
     """Service for interacting with AWS S3 for image storage"""
@@ -36,12 +75,14 @@ class S3Service:
             logger.warning("S3 storage is disabled, using local URLs")
             return
             
+        self._cf_signer: Optional[CloudFrontSigner] = None
         try:
             self.s3_client = boto3.client(
                 's3',
                 aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
                 aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_REGION
+                region_name=settings.AWS_REGION,
+                config=S3_CLIENT_CONFIG
             )
             self.bucket_name = settings.S3_BUCKET_NAME
             self.s3_prefix = settings.S3_PREFIX
@@ -54,7 +95,12 @@ class S3Service:
                     if not settings.CLOUDFRONT_KEY_PAIR_ID or not settings.CLOUDFRONT_PRIVATE_KEY_PATH:
                         logger.warning("CloudFront signed URLs enabled but missing key configuration")
                     else:
-                        logger.info("CloudFront signed URLs enabled")
+                        try:
+                            self._cf_signer = self._create_cloudfront_signer()
+                            logger.info("CloudFront signed URLs enabled")
+                        except Exception as e:
+                            # Unsigned CloudFront URLs are still returned, same as a missing key configuration
+                            logger.error(f"Error loading CloudFront private key: {e}")
         except Exception as e:
             logger.error(f"Error connecting to S3, disabling S3 storage: {str(e)}")
             self.enabled = False
@@ -81,7 +127,7 @@ class S3Service:
             
         try:
             filename = os.path.basename(image_path)
-            content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            content_type = _content_type(os.path.splitext(filename)[1].lower())
             
             if not os.path.exists(image_path):
                 return {
@@ -99,38 +145,11 @@ class S3Service:
                 s3_key,
                 ExtraArgs={
                     'ContentType': content_type
-                }
+                },
+                Config=_transfer_config(file_size)
             )
             
-            # Generate S3 URL
-            s3_url = f"https://{self.bucket_name}.s3.amazonaws.com/{s3_key}"
-            
-            # Generate CloudFront URL if enabled
-            if self.cloudfront_enabled:
-                if settings.CLOUDFRONT_SIGNED_URLS_ENABLED:
-                    cloudfront_url = self._generate_cloudfront_signed_url(s3_key)
-                else:
-                    cloudfront_url = f"https://{settings.CLOUDFRONT_DOMAIN}/{s3_key}"
-                
-                logger.info(f"Generated CloudFront URL for {filename}: {cloudfront_url}")
-                
-                result = {
-                    "filename": filename,
-                    "url": cloudfront_url, 
-                    "s3_url": s3_url,       
-                    "cloudfront_url": cloudfront_url,
-                    "s3_key": s3_key
-                }
-            else:
-                logger.info(f"Successfully uploaded {filename} to S3: {s3_url}")
-                result = {
-                    "filename": filename,
-                    "url": s3_url,
-                    "s3_url": s3_url,
-                    "s3_key": s3_key
-                }
-                
-            return result
+            return self._build_urls(filename, s3_key)
             
         except ClientError as e:
             error_message = str(e)
@@ -151,31 +170,110 @@ class S3Service:
                 "error": error_message
             }
     
+    def upload_stream(self, url: str, filename: str, subfolder: str = None) -> Dict[str, str]:
+        """
+        Stream an image from a URL straight into S3 and return URLs, without a temporary file.
+        
+        Args:
+            url: URL of the image, e.g. the ComfyUI /view URL
+            filename: Name of the image file
+            subfolder: Subfolder within the S3 prefix
+            
+        Returns:
+            Dict with URLs for the uploaded image
+        """
+        try:
+            content_type = _content_type(os.path.splitext(filename)[1].lower())
+            s3_key = self._generate_s3_key(filename, subfolder)
+            
+            response = _HTTP_POOL.request('GET', url, preload_content=False)
+            try:
+                if response.status >= 400:
+                    raise urllib3.exceptions.HTTPError(f"HTTP Error {response.status}")
+                content_length = response.headers.get("Content-Length")
+                self.s3_client.upload_fileobj(
+                    response,
+                    self.bucket_name,
+                    s3_key,
+                    ExtraArgs={
+                        'ContentType': content_type
+                    },
+                    Config=_transfer_config(int(content_length) if content_length else None)
+                )
+            finally:
+                # Only a fully read response can hand its connection back to the pool
+                response.drain_conn()
+                response.release_conn()
+            
+            return self._build_urls(filename, s3_key)
+            
+        except Exception as e:
+            logger.error(f"Error uploading image {filename} from {url}: {e}")
+            # Return source URL as fallback
+            return {
+                "url": url,
+                "error": str(e)
+            }
+    
+    def _build_urls(self, filename: str, s3_key: str) -> Dict[str, str]:
+        """Build the S3 and, if enabled, CloudFront URLs of an uploaded image"""
+        # Generate S3 URL
+        s3_url = f"https://{self.bucket_name}.s3.amazonaws.com/{s3_key}"
+        
+        # Generate CloudFront URL if enabled
+        if self.cloudfront_enabled:
+            if settings.CLOUDFRONT_SIGNED_URLS_ENABLED:
+                cloudfront_url = self._generate_cloudfront_signed_url(s3_key)
+            else:
+                cloudfront_url = f"https://{settings.CLOUDFRONT_DOMAIN}/{s3_key}"
+        
+            logger.info(f"Generated CloudFront URL for {filename}: {cloudfront_url}")
+        
+            result = {
+                "filename": filename,
+                "url": cloudfront_url, 
+                "s3_url": s3_url,       
+                "cloudfront_url": cloudfront_url,
+                "s3_key": s3_key
+            }
+        else:
+            logger.info(f"Successfully uploaded {filename} to S3: {s3_url}")
+            result = {
+                "filename": filename,
+                "url": s3_url,
+                "s3_url": s3_url,
+                "s3_key": s3_key
+            }
+        
+        return result
+        
+    def _create_cloudfront_signer(self) -> CloudFrontSigner:
+        """Load the CloudFront private key once and create the signer shared by all signed URLs"""
+        with open(settings.CLOUDFRONT_PRIVATE_KEY_PATH, 'rb') as key_file:
+            private_key = load_pem_private_key(
+                key_file.read(),
+                password=None,
+                backend=default_backend()
+            )
+        
+        def rsa_signer(message):
+            return private_key.sign(message, padding.PKCS1v15(), hashes.SHA1())
+        
+        return CloudFrontSigner(settings.CLOUDFRONT_KEY_PAIR_ID, rsa_signer)
+    
     def _generate_cloudfront_signed_url(self, s3_key: str) -> str:
         """Generate a signed CloudFront URL for the given S3 key"""
-        if not settings.CLOUDFRONT_KEY_PAIR_ID or not settings.CLOUDFRONT_PRIVATE_KEY_PATH:
+        if self._cf_signer is None:
             logger.warning("CloudFront signed URLs enabled but missing key configuration")
             return f"https://{settings.CLOUDFRONT_DOMAIN}/{s3_key}"
             
-        try:            
-            def rsa_signer(message):
-                with open(settings.CLOUDFRONT_PRIVATE_KEY_PATH, 'rb') as key_file:
-                    private_key = load_pem_private_key(
-                        key_file.read(),
-                        password=None,
-                        backend=default_backend()
-                    )
-                return private_key.sign(message, padding.PKCS1v15(), hashes.SHA1())
-                
-            key_id = settings.CLOUDFRONT_KEY_PAIR_ID
-            cf_signer = CloudFrontSigner(key_id, rsa_signer)
-            
+        try:
             # Set expiration time
             expire_date = datetime.datetime.now() + datetime.timedelta(seconds=settings.CLOUDFRONT_URL_EXPIRATION)
             
             # Generate the URL
             url = f"https://{settings.CLOUDFRONT_DOMAIN}/{s3_key}"
-            signed_url = cf_signer.generate_presigned_url(
+            signed_url = self._cf_signer.generate_presigned_url(
                 url,
                 date_less_than=expire_date
             )
@@ -187,7 +285,7 @@ class S3Service:
             logger.exception("Detailed error:")
             return f"https://{settings.CLOUDFRONT_DOMAIN}/{s3_key}"
     
-    def process_comfyui_images(self, prompt_id: str, image_data: Dict[str, List[Dict[str, str]]], cleanup: Optional[bool] = None) -> Dict[str, List[Dict[str, str]]]:
+    def process_comfyui_images(self, prompt_id: str, image_data: Dict[str, List[Dict[str, str]]]) -> Dict[str, List[Dict[str, str]]]:
         """
         Process ComfyUI image data, upload images to S3, and update URLs.
         
@@ -202,41 +300,15 @@ class S3Service:
             logger.info("S3 storage disabled, skipping image upload")
             return image_data
         
-        if cleanup is None:
-            cleanup = settings.LOCAL_IMAGE_CLEANUP_AFTER_UPLOAD
-        
         try:
-            result = {}
+            # Images are uploaded one after another, callers run prompts in parallel (see ComfyUIClient)
+            for node_images in image_data.values():
+                for image in node_images:
+                    self._process_image(image)
+            result = {node_id: list(node_images) for node_id, node_images in image_data.items()}
             
-            for node_id, images in image_data.items():
-                uploaded_images = []
-                
-                for image in images:
-                    if "url" in image:
-                        image_url = image["url"]
-                        filename = image.get("filename")
-                        subfolder = image.get("subfolder")
-                        filetype = image.get("type")
-                        
-                        local_path = self._download_image(image_url, filename)
-                        
-                        if local_path:
-                            s3_data = self.upload_image(local_path, subfolder)
-                            
-                            image.update({
-                                "s3_url": s3_data.get("s3_url"),
-                                "url": s3_data.get("url") 
-                            })
-                            
-                            # Cleanup the local file (optional)
-                            if cleanup:
-                                os.remove(local_path)
-                            
-                    uploaded_images.append(image)
-                
-                result[node_id] = uploaded_images
-            
-            logger.info(f"Processed {sum(len(images) for images in result.values())} images for prompt {prompt_id}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"Processed {sum(map(len, result.values()))} images for prompt {prompt_id}")
             return result
             
         except Exception as e:
@@ -245,33 +317,38 @@ class S3Service:
             # Return original data as fallback
             return image_data
     
+    def _process_image(self, image: Dict[str, str]) -> Dict[str, str]:
+        """
+        Upload a single ComfyUI image to S3 and update its URLs in place.
+        
+        Args:
+            image: Image data from ComfyUI
+            
+        Returns:
+            The updated image data
+        """
+        if "url" not in image:
+            return image
+        
+        s3_data = self.upload_stream(image["url"], image.get("filename"), image.get("subfolder"))
+        image.update({
+            "s3_url": s3_data.get("s3_url"),
+            "url": s3_data.get("url") 
+        })
+        # Keep the upload error in the task result, the image still points at its ComfyUI URL
+        if "error" in s3_data:
+            image["error"] = s3_data["error"]
+        return image
+    
     def _generate_s3_key(self, filename: str, subfolder: str = None) -> str:
         """Generate a unique S3 key for the image"""
-        from datetime import datetime
-        
-        date_prefix = datetime.now().strftime("%Y-%m-%d")
-        unique_id = str(uuid.uuid4())[:8]
+        date_prefix = datetime.date.today().isoformat()
+        unique_id = secrets.token_hex(4)
         
         if subfolder:
             return f"{self.s3_prefix}{date_prefix}/{subfolder}/{unique_id}_{filename}"
         else:
             return f"{self.s3_prefix}{date_prefix}/{unique_id}_{filename}"
-    
-    def _download_image(self, url: str, filename: str) -> Optional[str]:
-        """Download an image from URL to local temporary storage"""
-        import tempfile
-        import urllib.request
-        
-        try:
-            temp_dir = tempfile.gettempdir()
-            local_path = os.path.join(temp_dir, filename)
-            
-            urllib.request.urlretrieve(url, local_path)
-            
-            return local_path
-        except Exception as e:
-            logger.error(f"Error downloading image {filename} from {url}: {e}")
-            return None
 
 @functools.lru_cache(maxsize=1)
 def get_s3_service() -> S3Service:
@@ -281,6 +358,4 @@ def get_s3_service() -> S3Service:
     Returns:
         S3Service: The singleton instance
     """
-    return S3Service() 
-
-get_s3_service()
+    return S3Service()
@@ -1,18 +1,34 @@
-import json
 import uuid
+import logging
 from datetime import datetime
 import redis
-from pydantic import BaseModel
-from typing import Dict, Any, Optional, List
-from enum import Enum, auto
+import redis.asyncio
+import msgspec
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
+from enum import Enum
 import functools
 import asyncio
+import time
 import httpx
 
 from app.config import settings
 from app.logging import get_logger
 
-logger = get_logger()
+logger = get_logger(__name__)
+
+TASKS_INDEX_KEY = "tasks:all"
+TASKS_BATCH_SIZE = 100
+WEBHOOK_QUEUE_SIZE = 1024
+WEBHOOK_WORKERS = 4
+# How long close() waits for queued webhooks before dropping the rest
+WEBHOOK_DRAIN_TIMEOUT_SECONDS = 10.0
+# Views of finished tasks are kept in memory, since their status and result no longer change
+TERMINAL_VIEW_CACHE_SIZE = 1024
+TERMINAL_VIEW_TTL_SECONDS = 60.0
+
+# Shared encoder/decoder for the JSON-encoded task fields (parameters, result)
+_json_encoder = msgspec.json.Encoder()
+_json_decoder = msgspec.json.Decoder()
 
 
 class TaskStatus(str, Enum):
@@ -27,8 +43,13 @@ class TaskStatus(str, Enum):
         """Convert status to a dictionary."""
         return {"status": self.value} 
 
+# Plain dict lookup for hydrating stored statuses, cheaper than calling the enum
+_STATUS_BY_VALUE: Dict[str, TaskStatus] = {status.value: status for status in TaskStatus}
+_TERMINAL_STATUS_VALUES = (TaskStatus.COMPLETED.value, TaskStatus.FAILED.value)
 
-class Task(BaseModel):
+
+class Task(msgspec.Struct, kw_only=True):
+    """Task record as stored in Redis"""
     id: str
     workflow_name: str
     parameters: Dict[str, Any]
@@ -44,12 +65,12 @@ class Task(BaseModel):
         return {
             "id": self.id,
             "workflow_name": self.workflow_name,
-            "parameters": json.dumps(self.parameters),
+            "parameters": _json_encoder.encode(self.parameters).decode(),
             "status": self.status.value,
             "progress": str(self.progress),
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
-            "result": json.dumps(self.result) if self.result else "",
+            "result": _json_encoder.encode(self.result).decode() if self.result else "",
             "prompt_id": self.prompt_id if self.prompt_id else ""
         }
     
@@ -59,12 +80,12 @@ class Task(BaseModel):
         return cls(
             id=data["id"],
             workflow_name=data["workflow_name"],
-            parameters=json.loads(data["parameters"]) if data["parameters"] else {},
-            status=TaskStatus(data["status"]),
+            parameters=_json_decoder.decode(data["parameters"]) if data["parameters"] else {},
+            status=_STATUS_BY_VALUE[data["status"]],
             progress=int(data["progress"]),
             created_at=datetime.fromisoformat(data["created_at"]),
             updated_at=datetime.fromisoformat(data["updated_at"]),
-            result=json.loads(data["result"]) if data["result"] else None,
+            result=_json_decoder.decode(data["result"]) if data["result"] else None,
             prompt_id=data["prompt_id"] if data["prompt_id"] else None
         )
 
@@ -76,14 +97,32 @@ class TaskManager:
             redis_url: Optional Redis URL (defaults to settings.REDIS_URL)
             ttl: Optional TTL in seconds (defaults to settings.TASK_TTL_SECONDS)
         """
-        self.redis = redis.Redis.from_url(
+        self.redis = redis.asyncio.Redis.from_url(
             redis_url or settings.REDIS_URL, 
-            decode_responses=True
+            decode_responses=True,
+            max_connections=50,
+            # Pooled connections idle between requests are checked before reuse
+            health_check_interval=30
         )
         self.ttl = ttl or settings.TASK_TTL_SECONDS
+        # task_id -> (expires at, fields, view) of tasks that already finished, so status polls skip Redis
+        self._terminal_views: Dict[str, Tuple[float, Tuple[str, ...], Dict[str, Any]]] = {}
+        # Keep-alive client shared by all proxy webhooks
+        self._http = httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            headers={
+                "Authorization": f"Bearer {settings.PROXY_WEBHOOK_SECRET}",
+                "Content-Type": "application/json"
+            }
+        )
+        # Bounded webhook queue, created on the running loop by start()
+        self._webhook_queue: Optional[asyncio.Queue] = None
+        self._webhook_workers: List[asyncio.Task] = []
+        self._webhooks_in_flight = 0
         logger.info(f"Redis for task initialized to {redis_url or settings.REDIS_URL}")
         
-    def create_task(self, workflow_name: str, parameters: Dict[str, Any]) -> Task:
+    async def create_task(self, workflow_name: str, parameters: Dict[str, Any]) -> Task:
         """
         Create a new task and store it in Redis.
         
@@ -109,15 +148,19 @@ class TaskManager:
         
         try:
             key = f"task:{task_id}"
-            self.redis.hset(key, mapping=task.to_redis_dict())
-            self.redis.expire(key, self.ttl)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hset(key, mapping=task.to_redis_dict())
+            pipe.expire(key, self.ttl)
+            # The index itself never expires, ids of expired tasks are pruned lazily by _get_tasks_batch
+            pipe.sadd(TASKS_INDEX_KEY, task_id)
+            await pipe.execute()
             logger.debug(f"Created task {task_id} for workflow {workflow_name}")
             return task
         except redis.RedisError as e:
             logger.error(f"Redis error creating task: {e}")
             return task
     
-    def update_task_progress(self, task_id: str, progress: int) -> bool:
+    async def update_task_progress(self, task_id: str, progress: int) -> bool:
         """
         Update a task's progress percentage.
         
@@ -128,27 +171,61 @@ class TaskManager:
         Returns:
             bool: True if update was successful, False otherwise
         """
-        key = f"task:{task_id}"
-        
         try:
-            task_data = self.redis.hgetall(key)
-            if not task_data:
+            fields = {
+                "progress": str(max(0, min(100, progress))),
+                "updated_at": datetime.now().isoformat()
+            }
+            if await self._update_task_fields(task_id, fields) is None:
                 logger.warning(f"Task {task_id} not found for progress update")
                 return False
                 
-            task = Task.from_redis_dict(task_data)
-            
-            task.progress = max(0, min(100, progress))  
-            task.updated_at = datetime.now()
-            
-            self.redis.hset(key, mapping=task.to_redis_dict())
-            logger.debug(f"Updated task {task_id} progress to {progress}%")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Updated task {task_id} progress to {progress}%")
             return True
         except redis.RedisError as e:
             logger.error(f"Redis error updating task progress: {e}")
             return False
         
-    def update_task_status(self, task_id: str, status: str, result: Optional[Dict[str, Any]] = None) -> bool:
+    async def update_tasks_progress(self, progress: Dict[str, int]) -> int:
+        """
+        Update the progress percentage of several tasks in a single pipelined round-trip.
+        
+        Args:
+            progress: Dict[task_id, progress percentage (0-100)]
+            
+        Returns:
+            int: Number of tasks that were updated
+        """
+        try:
+            updated_at = datetime.now().isoformat()
+            task_ids = list(progress)
+            
+            pipe = self.redis.pipeline(transaction=False)
+            for task_id in task_ids:
+                key = f"task:{task_id}"
+                self._terminal_views.pop(task_id, None)
+                pipe.exists(key)
+                pipe.hset(key, mapping={
+                    "progress": str(max(0, min(100, progress[task_id]))),
+                    "updated_at": updated_at
+                })
+            results = await pipe.execute()
+            
+            # HSET created partial hashes for unknown tasks, drop them again
+            missing = [task_id for task_id, exists in zip(task_ids, results[::2]) if not exists]
+            if missing:
+                await self.redis.delete(*(f"task:{task_id}" for task_id in missing))
+                logger.warning(f"Tasks {missing} not found for progress update")
+            
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Updated progress of {len(task_ids) - len(missing)} tasks")
+            return len(task_ids) - len(missing)
+        except redis.RedisError as e:
+            logger.error(f"Redis error updating task progress: {e}")
+            return 0
+        
+    async def update_task_status(self, task_id: str, status: str, result: Optional[Dict[str, Any]] = None) -> bool:
         """
         Update the status and optionally the result of a task.
         
@@ -161,36 +238,49 @@ class TaskManager:
             bool: True if successful, False otherwise
         """
         try:
-            task_key = f"task:{task_id}"
-            task_data = self.redis.hgetall(task_key)
-            
-            if not task_data:
-                logger.warning(f"Task {task_id} not found for status update")
-                return False
-                
             status_enum = status if isinstance(status, TaskStatus) else TaskStatus(status)
             
-            task_data["status"] = status_enum.value
-            task_data["updated_at"] = datetime.now().isoformat()
-            
+            fields = {
+                "status": status_enum.value,
+                "updated_at": datetime.now().isoformat()
+            }
             if result is not None:
-                task_data["result"] = json.dumps(result)
+                fields["result"] = _json_encoder.encode(result).decode()
+            
+            terminal = status_enum == TaskStatus.COMPLETED or status_enum == TaskStatus.FAILED
             
-            self.redis.hset(task_key, mapping=task_data)
-            self.redis.expire(task_key, self.ttl)
+            # Send notification for completed/failed tasks
+            notify = settings.PROXY_WEBHOOK_URL and terminal
+            
+            # Read what the webhook needs in the same round-trip as the update
+            stored = await self._update_task_fields(
+                task_id, 
+                fields, 
+                refresh_ttl=terminal,
+                read_fields=("workflow_name", "created_at", "result") if notify else ()
+            )
+            if stored is None:
+                logger.warning(f"Task {task_id} not found for status update")
+                return False
             
             logger.debug(f"Updated task {task_id} status to {status_enum.value}")
             
-            # Send notification for completed/failed tasks
-            if settings.PROXY_WEBHOOK_URL and (status_enum == TaskStatus.COMPLETED or status_enum == TaskStatus.FAILED):
-                asyncio.create_task(self._notify_proxy_server(task_id, status_enum.value, result))
+            if notify:
+                self._enqueue_webhook({
+                    "task_id": task_id,
+                    "status": status_enum.value,
+                    "workflow_name": stored["workflow_name"],
+                    "created_at": stored["created_at"],
+                    "updated_at": fields["updated_at"],
+                    "result": _json_decoder.decode(stored["result"]) if stored["result"] else None
+                })
             
             return True
         except Exception as e:
             logger.error(f"Redis error updating task status: {e}")
             return False
     
-    def update_task_result(self, task_id: str, result: Dict[str, Any]) -> bool:
+    async def update_task_result(self, task_id: str, result: Dict[str, Any]) -> bool:
         """
         Update only the result of a task without changing its status.
         
@@ -202,27 +292,22 @@ class TaskManager:
             bool: True if successful, False otherwise
         """
         try:
-            task_key = f"task:{task_id}"
-            task_data = self.redis.hgetall(task_key)
-            
-            if not task_data:
+            # Update only the result and updated_at timestamp
+            fields = {
+                "result": _json_encoder.encode(result).decode(),
+                "updated_at": datetime.now().isoformat()
+            }
+            if await self._update_task_fields(task_id, fields) is None:
                 logger.warning(f"Task {task_id} not found for result update")
                 return False
             
-            # Update only the result and updated_at timestamp
-            task_data["result"] = json.dumps(result)
-            task_data["updated_at"] = datetime.now().isoformat()
-            
-            self.redis.hset(task_key, mapping=task_data)
-            self.redis.expire(task_key, self.ttl)
-            
             logger.debug(f"Updated task {task_id} result with {len(result)} output nodes")
             return True
         except Exception as e:
             logger.error(f"Redis error updating task result: {e}")
             return False
             
-    def get_task(self, task_id: str) -> Optional[Task]:
+    async def get_task(self, task_id: str) -> Optional[Task]:
         """Get task data by ID
         
         Args:
@@ -234,7 +319,7 @@ class TaskManager:
         key = f"task:{task_id}"
         
         try:
-            task_data = self.redis.hgetall(key)
+            task_data = await self.redis.hgetall(key)
             if not task_data:
                 logger.debug(f"Task {task_id} not found")
                 return None
@@ -244,7 +329,53 @@ class TaskManager:
             logger.error(f"Redis error retrieving task: {e}")
             return None
 
-    def get_task_by_prompt_id(self, prompt_id: str) -> Optional[Task]:
+    async def get_task_view(
+        self, 
+        task_id: str, 
+        fields: Tuple[str, ...] = ("status", "progress", "result")
+    ) -> Optional[Dict[str, Any]]:
+        """Get only some fields of a task, without building the whole Task
+        
+        Args:
+            task_id: ID of the task to retrieve
+            fields: Redis hash fields to read. "progress" is returned as int and "result" as decoded JSON
+            
+        Returns:
+            Optional[Dict[str, Any]]: Values of the requested fields if the task exists, None otherwise.
+                Views of finished tasks are shared between calls and must not be modified
+        """
+        cached = self._terminal_views.get(task_id)
+        if cached is not None and cached[1] == fields and cached[0] > time.monotonic():
+            return cached[2]
+        
+        try:
+            values = await self.redis.hmget(f"task:{task_id}", fields)
+        except redis.RedisError as e:
+            logger.error(f"Redis error retrieving task: {e}")
+            return None
+        
+        # Every stored task has all fields, so all-missing means the hash does not exist
+        if all(value is None for value in values):
+            logger.debug(f"Task {task_id} not found")
+            return None
+        
+        view = dict(zip(fields, values))
+        if "progress" in view:
+            view["progress"] = int(view["progress"] or 0)
+        if "result" in view:
+            view["result"] = _json_decoder.decode(view["result"]) if view["result"] else None
+        if view.get("status") in _TERMINAL_STATUS_VALUES:
+            self._cache_terminal_view(task_id, fields, view)
+        return view
+
+    def _cache_terminal_view(self, task_id: str, fields: Tuple[str, ...], view: Dict[str, Any]):
+        """Remember the view of a finished task, dropping the oldest entry when the cache is full"""
+        self._terminal_views.pop(task_id, None)
+        if len(self._terminal_views) >= TERMINAL_VIEW_CACHE_SIZE:
+            self._terminal_views.pop(next(iter(self._terminal_views)))
+        self._terminal_views[task_id] = (time.monotonic() + TERMINAL_VIEW_TTL_SECONDS, fields, view)
+
+    async def get_task_by_prompt_id(self, prompt_id: str) -> Optional[Task]:
         """Get task by prompt_id
         
         Args:
@@ -254,13 +385,9 @@ class TaskManager:
             Optional[Task]: Task object if found, None otherwise
         """
         try:
-            # Get all task keys
-            task_keys = self.redis.keys("task:*")
-            
-            for key in task_keys:
-                task_data = self.redis.hgetall(key)
-                if task_data.get("prompt_id") == prompt_id:
-                    return Task.from_redis_dict(task_data)
+            task_id = await self.redis.get(f"prompt:{prompt_id}")
+            if task_id:
+                return await self.get_task(task_id)
                 
             logger.debug(f"No task found with prompt_id {prompt_id}")
             return None
@@ -268,27 +395,59 @@ class TaskManager:
             logger.error(f"Redis error retrieving task by prompt_id: {e}")
             return None
 
-    def get_all_tasks(self) -> List[Task]:
+    async def get_all_tasks(self) -> List[Task]:
         """Get all tasks from Redis
         
         Returns:
             List[Task]: List of all tasks
         """
-        try:
-            task_keys = self.redis.keys("task:*")
-            tasks = []
+        return [task async for task in self.iter_tasks()]
+
+    async def iter_tasks(self, batch_size: int = TASKS_BATCH_SIZE) -> AsyncIterator[Task]:
+        """Iterate over all tasks without loading them all at once
+        
+        The task index is walked with SSCAN and each batch of tasks is fetched with one pipelined round-trip.
+        
+        Args:
+            batch_size: Number of tasks fetched per round-trip
             
-            for key in task_keys:
-                task_data = self.redis.hgetall(key)
-                if task_data:
-                    tasks.append(Task.from_redis_dict(task_data))
-                    
-            return tasks
+        Yields:
+            Task: Each task that still exists in Redis
+        """
+        try:
+            batch = []
+            async for task_id in self.redis.sscan_iter(TASKS_INDEX_KEY, count=batch_size):
+                batch.append(task_id)
+                if len(batch) >= batch_size:
+                    for task in await self._get_tasks_batch(batch):
+                        yield task
+                    batch = []
+            if batch:
+                for task in await self._get_tasks_batch(batch):
+                    yield task
         except redis.RedisError as e:
             logger.error(f"Redis error retrieving all tasks: {e}")
-            return []
 
-    def update_prompt_id(self, task_id: str, prompt_id: str) -> bool:
+    async def _get_tasks_batch(self, task_ids: List[str]) -> List[Task]:
+        """Fetch a batch of tasks in one pipelined round-trip, pruning index entries of expired tasks"""
+        pipe = self.redis.pipeline(transaction=False)
+        for task_id in task_ids:
+            pipe.hgetall(f"task:{task_id}")
+        
+        tasks = []
+        expired_ids = []
+        for task_id, task_data in zip(task_ids, await pipe.execute()):
+            if task_data:
+                tasks.append(Task.from_redis_dict(task_data))
+            else:
+                expired_ids.append(task_id)
+        
+        # Tasks expire by TTL, so prune their leftover index entries lazily
+        if expired_ids:
+            await self.redis.srem(TASKS_INDEX_KEY, *expired_ids)
+        return tasks
+
+    async def update_prompt_id(self, task_id: str, prompt_id: str) -> bool:
         """
         Update a task's prompt_id after queueing with ComfyUI.
         
@@ -300,27 +459,28 @@ class TaskManager:
             bool: True if update was successful, False otherwise
         """
         key = f"task:{task_id}"
+        self._terminal_views.pop(task_id, None)
         
         try:
-            task_data = self.redis.hgetall(key)
-            if not task_data:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.exists(key)
+            pipe.hset(key, mapping={
+                "prompt_id": prompt_id,
+                "updated_at": datetime.now().isoformat()
+            })
+            pipe.set(f"prompt:{prompt_id}", task_id, ex=self.ttl)
+            if not (await pipe.execute())[0]:
+                await self.redis.delete(key, f"prompt:{prompt_id}")
                 logger.warning(f"Task {task_id} not found for prompt_id update")
                 return False
             
-            task = Task.from_redis_dict(task_data)
-            
-            task.prompt_id = prompt_id
-            task.updated_at = datetime.now()
-            
-            self.redis.hset(key, mapping=task.to_redis_dict())
-            self.redis.expire(key, self.ttl)
             logger.debug(f"Updated task {task_id} with prompt_id {prompt_id}")
             return True
         except redis.RedisError as e:
             logger.error(f"Redis error updating task prompt_id: {e}")
             return False
 
-    def update_task_parameters(self, task_id: str, parameters: Dict[str, Any]) -> bool:
+    async def update_task_parameters(self, task_id: str, parameters: Dict[str, Any]) -> bool:
         """
         Update a task's parameters.
         
@@ -334,65 +494,151 @@ class TaskManager:
         key = f"task:{task_id}"
         
         try:
-            task_data = self.redis.hgetall(key)
-            if not task_data:
+            # The merge needs the stored parameters, but none of the other fields
+            stored_parameters = await self.redis.hget(key, "parameters")
+            if stored_parameters is None:
                 logger.warning(f"Task {task_id} not found for parameters update")
                 return False
             
-            task = Task.from_redis_dict(task_data)
-            
             # Merge the new parameters with existing ones
-            task.parameters.update(parameters)
-            task.updated_at = datetime.now()
+            merged_parameters = _json_decoder.decode(stored_parameters) if stored_parameters else {}
+            merged_parameters.update(parameters)
+            
+            fields = {
+                "parameters": _json_encoder.encode(merged_parameters).decode(),
+                "updated_at": datetime.now().isoformat()
+            }
+            if await self._update_task_fields(task_id, fields) is None:
+                logger.warning(f"Task {task_id} not found for parameters update")
+                return False
             
-            self.redis.hset(key, mapping=task.to_redis_dict())
-            self.redis.expire(key, self.ttl)
             logger.debug(f"Updated parameters for task {task_id}")
             return True
         except redis.RedisError as e:
             logger.error(f"Redis error updating task parameters: {e}")
             return False
 
-    async def _notify_proxy_server(self, task_id: str, status: str, result: Optional[Dict[str, Any]] = None):
+    async def _update_task_fields(
+        self, 
+        task_id: str, 
+        fields: Dict[str, str], 
+        refresh_ttl: bool = False,
+        read_fields: Tuple[str, ...] = ()
+    ) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Write only the given fields of an existing task in a single pipelined round-trip.
+        
+        Args:
+            task_id: ID of the task to update
+            fields: Redis hash fields to overwrite
+            refresh_ttl: Whether to re-arm the TTL of the task and its prompt index. The TTL set on create
+                survives HSET, so this is only needed to extend retention of finished tasks
+            read_fields: Hash fields to read back after the update, in the same round-trip
+            
+        Returns:
+            Optional[Dict[str, Optional[str]]]: Values of read_fields if the task existed, None otherwise
+        """
+        key = f"task:{task_id}"
+        self._terminal_views.pop(task_id, None)
+        
+        # The prompt index needs the prompt_id of the task to re-arm its TTL
+        hmget_fields = read_fields + ("prompt_id",) if refresh_ttl else read_fields
+        
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.exists(key)
+        pipe.hset(key, mapping=fields)
+        if refresh_ttl:
+            pipe.expire(key, self.ttl)
+        if hmget_fields:
+            pipe.hmget(key, hmget_fields)
+        results = await pipe.execute()
+        
+        if not results[0]:
+            # HSET created a partial hash for an unknown task, drop it again
+            await self.redis.delete(key)
+            return None
+        
+        values = results[-1] if hmget_fields else []
+        if refresh_ttl and values[-1]:
+            # SET rather than EXPIRE, so an index that already expired under a long-running task is restored
+            await self.redis.set(f"prompt:{values[-1]}", task_id, ex=self.ttl)
+        return dict(zip(read_fields, values))
+
+    async def ping(self) -> bool:
+        """Check that Redis is reachable
+        
+        Returns:
+            bool: True if Redis answered, False otherwise
+        """
+        try:
+            return await self.redis.ping()
+        except redis.RedisError as e:
+            logger.error(f"Redis is not reachable: {e}")
+            return False
+
+    async def start(self, workers: int = WEBHOOK_WORKERS):
+        """Start the workers that send proxy webhooks from the bounded queue"""
+        self._webhook_queue = asyncio.Queue(maxsize=WEBHOOK_QUEUE_SIZE)
+        self._webhook_workers = [asyncio.create_task(self._webhook_worker()) for _ in range(workers)]
+
+    async def close(self, timeout: float = WEBHOOK_DRAIN_TIMEOUT_SECONDS):
+        """Drain pending webhooks, then close the webhook HTTP client and the Redis connection pool
+        
+        Args:
+            timeout: Seconds to wait for queued webhooks to be sent. Webhooks still pending after that are dropped
+        """
+        if self._webhook_queue is not None:
+            try:
+                await asyncio.wait_for(self._webhook_queue.join(), timeout)
+            except asyncio.TimeoutError:
+                dropped = self._webhook_queue.qsize() + self._webhooks_in_flight
+                logger.error(f"Webhooks were not drained within {timeout}s, dropping {dropped} webhooks")
+            for worker in self._webhook_workers:
+                worker.cancel()
+            await asyncio.gather(*self._webhook_workers, return_exceptions=True)
+            self._webhook_queue = None
+            self._webhook_workers = []
+        await self._http.aclose()
+        await self.redis.aclose()
+
+    def _enqueue_webhook(self, payload: Dict[str, Any]):
+        """Queue a proxy webhook payload without waiting for it to be sent"""
+        if self._webhook_queue is None:
+            logger.error(f"Cannot send webhook for task {payload['task_id']} - webhook workers are not started")
+            return
+        
+        try:
+            self._webhook_queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            logger.error(f"Webhook queue is full, dropping webhook for task {payload['task_id']}")
+
+    async def _webhook_worker(self):
+        """Send queued proxy webhooks one at a time"""
+        while True:
+            payload = await self._webhook_queue.get()
+            self._webhooks_in_flight += 1
+            try:
+                await self._notify_proxy_server(payload)
+            finally:
+                self._webhooks_in_flight -= 1
+                self._webhook_queue.task_done()
+
+    async def _notify_proxy_server(self, payload: Dict[str, Any]):
         """
         Send notification to proxy server about task updates.
         Then the proxy server will permanently store the task data to its database.
         
         Args:
-            task_id: ID of the completed task
-            status: Status of the task (completed/failed)
-            result: Optional result data
+            payload: Webhook payload built by update_task_status (task_id, status, workflow_name, timestamps, result)
         """
         if not settings.PROXY_WEBHOOK_URL:
             return
-            
+        
+        task_id = payload["task_id"]
         try:
-            task = self.get_task(task_id)
-            if not task:
-                logger.error(f"Cannot send webhook - task {task_id} not found")
-                return
-                
-            payload = {
-                "task_id": task_id,
-                "status": status,
-                "workflow_name": task.workflow_name,
-                "created_at": task.created_at.isoformat(),
-                "updated_at": task.updated_at.isoformat(),
-                "result": task.result
-            }
-            
             # Send webhook
-            async with httpx.AsyncClient() as client:
-                logger.info(f"Sending webhook for task {task_id} to {settings.PROXY_WEBHOOK_URL}")
-                response = await client.post(
-                    settings.PROXY_WEBHOOK_URL,
-                    json=payload,
-                    headers={
-                        "Authorization": f"Bearer {settings.PROXY_WEBHOOK_SECRET}",
-                        "Content-Type": "application/json"
-                    },
-                    timeout=10.0
-                )
+            logger.info(f"Sending webhook for task {task_id} to {settings.PROXY_WEBHOOK_URL}")
+            response = await self._http.post(settings.PROXY_WEBHOOK_URL, json=payload)
                 
             if 200 <= response.status_code < 300:
                 logger.info(f"Successfully sent webhook for task {task_id}")
@@ -418,5 +664,3 @@ def get_task_manager(redis_url: Optional[str] = None, ttl: Optional[int] = None)
         TaskManager: The singleton instance
     """
     return TaskManager(redis_url, ttl)
-
-get_task_manager()
@@ -1,9 +1,31 @@
 from typing import Dict, Any, Optional
-import json
+import functools
+import httpx
+import orjson
 from pathlib import Path
-from urllib import request
 from ..config import settings
-from ..exceptions import WorkflowNotFoundError, WorkflowValidationError, WorkflowModificationError
+from ..exceptions import WorkflowNotFoundError, WorkflowValidationError
+
+
+@functools.lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    """
+    Get the keep-alive HTTP client shared by all workflow executors.
+    
+    Returns:
+        httpx.Client: The singleton instance
+    """
+    return httpx.Client(
+        base_url=settings.COMFY_API_URL,
+        timeout=30.0,
+        limits=httpx.Limits(max_keepalive_connections=32)
+    )
+
+def close_http_client() -> None:
+    """Close the shared HTTP client if an executor ever created it"""
+    if get_http_client.cache_info().currsize:
+        get_http_client().close()
+        get_http_client.cache_clear()
 
 class WorkflowExecutor:
     def __init__(self, workflow_path: str):
@@ -11,15 +33,23 @@ class WorkflowExecutor:
         if not self.workflow_path.exists():
             raise WorkflowNotFoundError(f"Workflow file not found: {workflow_path}")
         
+        self.mtime = self.workflow_path.stat().st_mtime_ns
         self.workflow = self._load_workflow()
     
     def _load_workflow(self) -> Dict[str, Any]:
         """Load workflow from JSON file"""
         try:
-            with open(self.workflow_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except json.JSONDecodeError as e:
+            workflow = orjson.loads(self.workflow_path.read_bytes())
+        except orjson.JSONDecodeError as e:
             raise WorkflowValidationError(f"Invalid workflow JSON: {str(e)}")
+        
+        # Check the node shape once here, so modifications can trust it
+        if not isinstance(workflow, dict):
+            raise WorkflowValidationError("Invalid workflow: expected nodes keyed by node ID (ComfyUI API format)")
+        for node_id, node in workflow.items():
+            if not isinstance(node, dict) or not isinstance(node.get("inputs", {}), dict):
+                raise WorkflowValidationError(f"Invalid workflow: node {node_id} must be an object with an inputs object")
+        return workflow
 
     def modify_node(self, node_id: str, updates: Dict[str, Any]) -> None:
         """Modify a specific node's inputs in the workflow"""
@@ -31,15 +61,37 @@ class WorkflowExecutor:
             node["inputs"] = {}
         
         node["inputs"].update(updates)
+        self.__dict__.pop("nodes_view", None)
+        self.__dict__.pop("_prompt_payload", None)
     
-    def get_nodes_by_type(self, class_type: str) -> Dict[str, Dict[str, Any]]:
-        """Get all nodes of a specific type"""
+    @functools.cached_property
+    def nodes_view(self) -> Dict[str, Dict[str, Any]]:
+        """Nodes in normalized format (class_type and inputs only), built once per loaded workflow"""
         return {
-            node_id: node 
-            for node_id, node in self.workflow.items() 
-            if node.get("class_type") == class_type
+            node_id: {
+                "class_type": node.get("class_type", ""),
+                "inputs": node.get("inputs", {})
+            }
+            for node_id, node in self.workflow.items()
         }
     
+    @functools.cached_property
+    def _prompt_payload(self) -> bytes:
+        """The /prompt request body of the unmodified workflow, encoded once per loaded workflow"""
+        return orjson.dumps({"prompt": self.workflow})
+    
+    @functools.cached_property
+    def _nodes_by_type(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Nodes grouped by class_type, built once per loaded workflow"""
+        nodes_by_type: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for node_id, node in self.workflow.items():
+            nodes_by_type.setdefault(node.get("class_type"), {})[node_id] = node
+        return nodes_by_type
+    
+    def get_nodes_by_type(self, class_type: str) -> Dict[str, Dict[str, Any]]:
+        """Get all nodes of a specific type"""
+        return dict(self._nodes_by_type.get(class_type, {}))
+    
     def update_workflow(self, modifications: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         Apply modifications to the workflow and return the updated workflow
@@ -53,16 +105,16 @@ class WorkflowExecutor:
             }
             
         Returns:
-            Dict[str, Any]: The updated workflow
+            Dict[str, Any]: The updated workflow. Untouched nodes are shared with the loaded template,
+            modified nodes get fresh node and inputs dicts so the template itself is never changed.
         """
         workflow = self.workflow.copy()
         
         if modifications:
             for node_id, updates in modifications.items():
                 if node_id in workflow:
-                    if "inputs" not in workflow[node_id]:
-                        workflow[node_id]["inputs"] = {}
-                    workflow[node_id]["inputs"].update(updates)
+                    node = workflow[node_id]
+                    workflow[node_id] = {**node, "inputs": {**node.get("inputs", {}), **updates}}
         
         return workflow
 
@@ -78,11 +130,22 @@ class WorkflowExecutor:
                 "6": {"text": "a photo of a cat"}
             }
         """
+        if not modifications:
+            self._queue_prompt_bytes(self._prompt_payload)
+            return
+        
         workflow = self.update_workflow(modifications)
         self._queue_prompt(workflow)
     
     def _queue_prompt(self, prompt: Dict[str, Any]) -> None:
         """Send the workflow to ComfyUI API"""
-        data = json.dumps({"prompt": prompt}).encode('utf-8')
-        req = request.Request(f"{settings.COMFY_API_URL}/prompt", data=data)
-        request.urlopen(req) 
\ No newline at end of file
+        self._queue_prompt_bytes(orjson.dumps({"prompt": prompt}))
+    
+    def _queue_prompt_bytes(self, payload: bytes) -> None:
+        """Send an already encoded /prompt request body to ComfyUI API"""
+        response = get_http_client().post(
+            "/prompt",
+            content=payload,
+            headers={"Content-Type": "application/json"}
+        )
+        response.raise_for_status() 
\ No newline at end of file
@@ -1,36 +1,73 @@
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 import os
 
 from .base import WorkflowExecutor
-from ..exceptions import WorkflowNotFoundError
+from ..exceptions import WorkflowNotFoundError, WorkflowValidationError
 from ..config import comfyui_fastapi_root
+from ..logging import get_logger
+
+logger = get_logger(__name__)
 
 
 class WorkflowRegistry:
     def __init__(self):
         self.workflows: Dict[str, WorkflowExecutor] = {}
         self.workflows_dir = Path(os.path.join(comfyui_fastapi_root, "workflows"))
+        self._dir_mtime: Optional[int] = None
     
     def load_workflows(self):
-        """Load all workflow JSON files from the workflows directory. Reload workflows in case new ones were added"""
-        self.workflows.clear()
-        for workflow_file in self.workflows_dir.glob("*.json"):
-            workflow_name = workflow_file.stem
-            self.workflows[workflow_name] = WorkflowExecutor(workflow_file)
+        """
+        Load all workflow JSON files from the workflows directory. Reload workflows in case new ones were added.
+        The directory is only rescanned when its mtime changed, and already loaded workflows are kept.
+        Invalid workflow files are logged and skipped, so they don't hide the valid ones.
+        """
+        dir_mtime = self.workflows_dir.stat().st_mtime_ns
+        if dir_mtime == self._dir_mtime:
+            return
+        self._dir_mtime = dir_mtime
+        
+        workflow_files = {workflow_file.stem: workflow_file for workflow_file in self.workflows_dir.glob("*.json")}
+        for workflow_name in list(self.workflows):
+            if workflow_name not in workflow_files:
+                del self.workflows[workflow_name]
+        for workflow_name, workflow_file in workflow_files.items():
+            if workflow_name not in self.workflows:
+                try:
+                    self.workflows[workflow_name] = WorkflowExecutor(workflow_file)
+                except WorkflowValidationError as e:
+                    logger.error(f"Skipping invalid workflow {workflow_file.name}: {e}")
+    
+    def warm(self):
+        """
+        Load all workflows and build their node listings now, so the first request for a workflow does not pay for it.
+        """
+        self.load_workflows()
+        for workflow in self.workflows.values():
+            _ = workflow.nodes_view
     
     def get_workflow(self, name: str) -> WorkflowExecutor:
-        """Get a workflow executor by name"""
-        if name not in self.workflows:
-            self.load_workflows()  
-            
-        if name not in self.workflows:
+        """
+        Get a workflow executor by name, loading only that workflow on a miss.
+        A cached executor is reloaded when its file's mtime changed since it was loaded.
+        """
+        workflow_file = self.workflows_dir / f"{name}.json"
+        if Path(name).name != name:
+            raise WorkflowNotFoundError(f"Workflow '{name}' not found")
+        
+        try:
+            mtime = workflow_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            self.workflows.pop(name, None)
             raise WorkflowNotFoundError(f"Workflow '{name}' not found")
-            
-        return self.workflows[name]
+        
+        workflow = self.workflows.get(name)
+        if workflow is None or workflow.mtime != mtime:
+            workflow = WorkflowExecutor(workflow_file)
+            self.workflows[name] = workflow
+        return workflow
     
     def get_workflow_names(self) -> List[str]:
         return list(self.workflows.keys())
 
 workflow_registry = WorkflowRegistry()
-workflow_registry.load_workflows() 
\ No newline at end of file
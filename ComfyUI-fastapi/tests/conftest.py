@@ -4,13 +4,15 @@ Load dotenv file and configure settings.
 """
 import os
 import sys
+import uuid
 import dotenv
 import pytest
+from PIL import Image
 
 comfyui_fastapi_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
 env_path = os.path.join(comfyui_fastapi_dir, '.env')
-dotenv.load_dotenv(env_path)
+dotenv.load_dotenv(env_path, override=False)
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_environment():
@@ -18,14 +20,58 @@ def setup_environment():
     Setup environment for all tests.
     This runs automatically for all tests due to autouse=True.
     """
-    from app.config import settings
+    # Set PYTEST_VERBOSE_ENV to print the settings the tests run with
+    if os.environ.get("PYTEST_VERBOSE_ENV"):
+        from app.config import settings
+        
+        print("\n=== Test Environment Configuration ===")
+        print(f"S3_STORAGE_ENABLED: {settings.S3_STORAGE_ENABLED}")
+        print(f"CLOUDFRONT_ENABLED: {settings.CLOUDFRONT_ENABLED}")
+        print(f"CLOUDFRONT_SIGNED_URLS_ENABLED: {settings.CLOUDFRONT_SIGNED_URLS_ENABLED}")
+        print(f"S3 Bucket: {settings.S3_BUCKET_NAME}")
+        print(f"CloudFront Domain: {settings.CLOUDFRONT_DOMAIN}")
+        print("=====================================\n")
     
-    print("\n=== Test Environment Configuration ===")
-    print(f"S3_STORAGE_ENABLED: {settings.S3_STORAGE_ENABLED}")
-    print(f"CLOUDFRONT_ENABLED: {settings.CLOUDFRONT_ENABLED}")
-    print(f"CLOUDFRONT_SIGNED_URLS_ENABLED: {settings.CLOUDFRONT_SIGNED_URLS_ENABLED}")
-    print(f"S3 Bucket: {settings.S3_BUCKET_NAME}")
-    print(f"CloudFront Domain: {settings.CLOUDFRONT_DOMAIN}")
-    print("=====================================\n")
+    yield
+
+
+@pytest.fixture
+def task_manager():
+    """TaskManager backed by an in-memory fake Redis"""
+    import fakeredis
+    from app.services.task_manager import TaskManager
+    
+    manager = TaskManager(ttl=60)
+    manager.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    return manager
+
+
+@pytest.fixture(scope="session")
+def s3_service():
+    """Initialize and return the S3 service"""
+    from app.services.s3_service import get_s3_service
     
-    yield  
+    service = get_s3_service()
+    return service
+
+
+@pytest.fixture(scope="session")
+def test_image(tmp_path_factory):
+    """Create a test image once per session and return its path"""
+    # Unique per session, also across parallel pytest-xdist workers
+    filepath = tmp_path_factory.mktemp("s3") / f"test_s3_cf_{uuid.uuid4().hex[:8]}.png"
+    
+    # Create a simple colored image
+    img = Image.new('RGB', (200, 200), color=(73, 109, 137))
+    # Only the upload round-trip matters, so spend as little as possible on zlib
+    img.save(filepath, format="PNG", compress_level=1)
+    
+    if os.environ.get("PYTEST_VERBOSE_ENV"):
+        print(f"Created test image: {filepath}")
+    return str(filepath)
+
+
+@pytest.fixture(scope="session")
+def uploaded_result(s3_service, test_image):
+    """Upload the test image once and share the upload result between tests"""
+    return s3_service.upload_image(test_image, "test")
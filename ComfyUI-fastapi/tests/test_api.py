@@ -1,5 +1,6 @@
 from fastapi.testclient import TestClient
 from app.main import app
+from app.routers import generation
 
 client = TestClient(app)
 
@@ -15,4 +16,29 @@ def test_get_workflow_nodes():
     assert response.status_code == 200
     nodes = response.json()["nodes"]
     assert "3" in nodes
-    assert nodes["3"]["class_type"] == "KSampler" 
\ No newline at end of file
+    assert nodes["3"]["class_type"] == "KSampler" 
+
+def test_list_workflows():
+    """Test listing the available workflows"""
+    response = client.get("/workflows")
+    assert response.status_code == 200
+    assert "basic" in response.json()["workflows"]
+
+def test_get_unknown_workflow_nodes():
+    """Test that an unknown workflow returns 404"""
+    response = client.get("/workflows/does_not_exist/nodes")
+    assert response.status_code == 404
+
+
+def test_generate_invalid_body():
+    """Test that an invalid generation body returns FastAPI's validation error shape"""
+    app.dependency_overrides[generation.get_app_task_manager] = lambda: None
+    app.dependency_overrides[generation.get_app_comfy_client] = lambda: None
+    try:
+        response = client.post("/generation", json={"modifications": {}})
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 422
+    detail = response.json()["detail"]
+    assert isinstance(detail, list)
+    assert detail[0]["loc"] == ["body"]
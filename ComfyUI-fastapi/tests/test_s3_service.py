@@ -0,0 +1,83 @@
+"""
+Test streaming ComfyUI images into S3 with stubbed HTTP and S3 clients.
+"""
+import pytest
+
+from app.services import s3_service as s3_module
+from app.services.s3_service import S3Service
+
+
+class StubResponse:
+    def __init__(self, status: int):
+        self.status = status
+        self.headers = {"Content-Length": "1024"}
+        self.released = False
+
+    def drain_conn(self):
+        pass
+
+    def release_conn(self):
+        self.released = True
+
+
+class StubPool:
+    def __init__(self, response: StubResponse):
+        self.response = response
+
+    def request(self, method, url, **kwargs):
+        return self.response
+
+
+class StubS3Client:
+    def __init__(self):
+        self.uploads = []
+
+    def upload_fileobj(self, fileobj, bucket, key, ExtraArgs=None, Config=None):
+        self.uploads.append((fileobj, bucket, key, ExtraArgs, Config))
+
+
+@pytest.fixture
+def stub_s3():
+    """S3Service with a stub S3 client, bypassing the boto3 setup"""
+    service = S3Service.__new__(S3Service)
+    service.enabled = True
+    service.cloudfront_enabled = False
+    service.s3_client = StubS3Client()
+    service.bucket_name = "bucket"
+    service.s3_prefix = "images/"
+    return service
+
+
+def test_upload_stream(stub_s3, monkeypatch):
+    """Test that a downloaded image is streamed into S3"""
+    response = StubResponse(200)
+    monkeypatch.setattr(s3_module, "_HTTP_POOL", StubPool(response))
+
+    image = {"filename": "out.png", "url": "http://comfy/view?filename=out.png"}
+    stub_s3._process_image(image)
+
+    (fileobj, bucket, key, extra_args, config), = stub_s3.s3_client.uploads
+    assert fileobj is response
+    assert bucket == "bucket"
+    assert key.startswith("images/") and key.endswith("_out.png")
+    assert extra_args == {"ContentType": "image/png"}
+    assert config is s3_module.S3_SINGLE_PART_CONFIG
+    assert image["s3_url"] == f"https://bucket.s3.amazonaws.com/{key}"
+    assert "error" not in image
+    assert response.released
+
+
+def test_upload_stream_http_error(stub_s3, monkeypatch):
+    """Test that a failed download keeps the source URL and reports the error"""
+    response = StubResponse(404)
+    monkeypatch.setattr(s3_module, "_HTTP_POOL", StubPool(response))
+
+    url = "http://comfy/view?filename=out.png"
+    image = {"filename": "out.png", "url": url}
+    stub_s3._process_image(image)
+
+    assert not stub_s3.s3_client.uploads
+    assert image["url"] == url
+    assert image["s3_url"] is None
+    assert "404" in image["error"]
+    assert response.released
@@ -0,0 +1,149 @@
+import asyncio
+import pytest
+from datetime import datetime
+from app.services.task_manager import Task, TaskStatus, TASKS_INDEX_KEY
+
+
+def test_task_redis_round_trip():
+    """Test that a task survives conversion to and from its Redis hash"""
+    now = datetime.now()
+    task = Task(
+        id="task-1",
+        workflow_name="basic",
+        parameters={"6": {"text": "a photo of a cat"}},
+        status=TaskStatus.COMPLETED,
+        progress=100,
+        created_at=now,
+        updated_at=now,
+        result={"9": [{"filename": "out.png"}]},
+        prompt_id="prompt-1"
+    )
+
+    restored = Task.from_redis_dict(task.to_redis_dict())
+    assert restored == task
+
+
+@pytest.mark.asyncio
+async def test_finished_task_stays_listed(task_manager):
+    """Test that the task index does not expire before the tasks it lists"""
+    task = await task_manager.create_task("basic", {})
+    await task_manager.update_task_status(task.id, TaskStatus.COMPLETED.value)
+
+    assert await task_manager.redis.ttl(TASKS_INDEX_KEY) == -1
+    assert [listed.id for listed in await task_manager.get_all_tasks()] == [task.id]
+
+
+@pytest.mark.asyncio
+async def test_expired_task_is_pruned_from_index(task_manager):
+    """Test that listing drops index entries of tasks that already expired"""
+    task = await task_manager.create_task("basic", {})
+    await task_manager.redis.delete(f"task:{task.id}")
+
+    assert await task_manager.get_all_tasks() == []
+    assert not await task_manager.redis.sismember(TASKS_INDEX_KEY, task.id)
+
+
+@pytest.mark.asyncio
+async def test_close_drops_stuck_webhooks(task_manager):
+    """close() gives up on webhooks that are not sent within the timeout"""
+    async def never_sent(payload):
+        await asyncio.Event().wait()
+
+    task_manager._notify_proxy_server = never_sent
+    await task_manager.start(workers=1)
+    for i in range(3):
+        task_manager._enqueue_webhook({"task_id": f"task-{i}"})
+    await asyncio.sleep(0)
+
+    await asyncio.wait_for(task_manager.close(timeout=0.05), 1.0)
+    assert task_manager._webhook_queue is None
+    assert task_manager._webhooks_in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_update_task_fields(task_manager):
+    """Fields of an existing task are written and read back in one round-trip"""
+    task = await task_manager.create_task("basic", {})
+
+    values = await task_manager._update_task_fields(
+        task.id, {"progress": "42"}, refresh_ttl=True, read_fields=("progress", "workflow_name")
+    )
+    assert values == {"progress": "42", "workflow_name": "basic"}
+    assert await task_manager.redis.ttl(f"task:{task.id}") == task_manager.ttl
+
+
+@pytest.mark.asyncio
+async def test_update_task_fields_unknown_task(task_manager):
+    """Updating an unknown task leaves no partial hash behind"""
+    assert await task_manager._update_task_fields("missing", {"progress": "42"}) is None
+    assert not await task_manager.redis.exists("task:missing")
+
+
+@pytest.mark.asyncio
+async def test_update_tasks_progress(task_manager):
+    """Only existing tasks are counted and updated, unknown ones are not created"""
+    first = await task_manager.create_task("basic", {})
+    second = await task_manager.create_task("basic", {})
+
+    updated = await task_manager.update_tasks_progress({first.id: 30, "missing": 50, second.id: 150})
+    assert updated == 2
+    assert (await task_manager.get_task(first.id)).progress == 30
+    assert (await task_manager.get_task(second.id)).progress == 100
+    assert not await task_manager.redis.exists("task:missing")
+
+
+@pytest.mark.asyncio
+async def test_update_prompt_id(task_manager):
+    """The prompt index resolves back to the task"""
+    task = await task_manager.create_task("basic", {})
+
+    assert await task_manager.update_prompt_id(task.id, "prompt-1")
+    assert await task_manager.redis.get("prompt:prompt-1") == task.id
+    found = await task_manager.get_task_by_prompt_id("prompt-1")
+    assert found.id == task.id
+    assert found.prompt_id == "prompt-1"
+
+
+@pytest.mark.asyncio
+async def test_update_prompt_id_unknown_task(task_manager):
+    """An unknown task gets neither a partial hash nor a prompt index entry"""
+    assert not await task_manager.update_prompt_id("missing", "prompt-1")
+    assert not await task_manager.redis.exists("task:missing", "prompt:prompt-1")
+    assert await task_manager.get_task_by_prompt_id("prompt-1") is None
+
+
+@pytest.mark.asyncio
+async def test_update_invalidates_terminal_view(task_manager):
+    """A cached view of a finished task is dropped when the task is updated"""
+    task = await task_manager.create_task("basic", {})
+    await task_manager.update_task_status(task.id, TaskStatus.COMPLETED.value, {"9": []})
+
+    view = await task_manager.get_task_view(task.id)
+    assert view["status"] == TaskStatus.COMPLETED.value
+    assert task.id in task_manager._terminal_views
+
+    await task_manager.update_task_status(task.id, TaskStatus.FAILED.value, {"error": "boom"})
+    view = await task_manager.get_task_view(task.id)
+    assert view["status"] == TaskStatus.FAILED.value
+    assert view["result"] == {"error": "boom"}
+
+    await task_manager.update_tasks_progress({task.id: 10})
+    assert task.id not in task_manager._terminal_views
+    assert (await task_manager.get_task_view(task.id))["progress"] == 10
+
+
+@pytest.mark.asyncio
+async def test_terminal_update_refreshes_prompt_index(task_manager):
+    """Finishing a task re-arms the prompt index together with the task"""
+    task = await task_manager.create_task("basic", {})
+    await task_manager.update_prompt_id(task.id, "prompt-1")
+    await task_manager.redis.expire("prompt:prompt-1", 5)
+    await task_manager.redis.expire(f"task:{task.id}", 5)
+
+    await task_manager.update_task_status(task.id, TaskStatus.COMPLETED.value)
+    assert await task_manager.redis.ttl("prompt:prompt-1") == task_manager.ttl
+    assert await task_manager.redis.ttl(f"task:{task.id}") == task_manager.ttl
+
+    await task_manager.redis.delete("prompt:prompt-1")
+    await task_manager.update_task_status(task.id, TaskStatus.FAILED.value)
+    assert (await task_manager.get_task_by_prompt_id("prompt-1")).id == task.id
@@ -1,7 +1,9 @@
 import pytest
+import shutil
 from pathlib import Path
 from app.workflows.base import WorkflowExecutor
-from app.exceptions import WorkflowNotFoundError
+from app.workflows.workflow_registry import WorkflowRegistry
+from app.exceptions import WorkflowNotFoundError, WorkflowValidationError
 import os
 
 from .conftest import comfyui_fastapi_dir
@@ -16,3 +18,37 @@ def test_load_workflow():
     assert executor.workflow is not None
     assert "3" in executor.workflow 
     assert executor.workflow["3"]["class_type"] == "KSampler"
+
+
+def test_update_workflow_keeps_template():
+    """Test that modifications are applied to a copy and never leak into the loaded workflow"""
+    workflow_path = Path(os.path.join(comfyui_fastapi_dir, "workflows", "basic.json"))
+    executor = WorkflowExecutor(workflow_path)
+    original_seed = executor.workflow["3"]["inputs"]["seed"]
+
+    modified = executor.update_workflow({"3": {"seed": original_seed + 1}})
+    assert modified["3"]["inputs"]["seed"] == original_seed + 1
+    assert executor.workflow["3"]["inputs"]["seed"] == original_seed
+
+
+def test_load_workflow_rejects_non_api_format(tmp_path):
+    """Test that a workflow whose nodes are not in API format is rejected on load"""
+    workflow_path = tmp_path / "ui_format.json"
+    workflow_path.write_text('{"nodes": [{"id": 3, "type": "KSampler"}]}')
+
+    with pytest.raises(WorkflowValidationError):
+        WorkflowExecutor(workflow_path)
+
+
+def test_registry_skips_invalid_workflow(tmp_path):
+    """Test that an invalid workflow file is skipped on load but still rejected when requested"""
+    shutil.copy(os.path.join(comfyui_fastapi_dir, "workflows", "basic.json"), tmp_path / "basic.json")
+    (tmp_path / "ui_format.json").write_text('{"nodes": [{"id": 3, "type": "KSampler"}]}')
+    registry = WorkflowRegistry()
+    registry.workflows_dir = tmp_path
+
+    registry.warm()
+    assert registry.get_workflow_names() == ["basic"]
+    assert "3" in registry.get_workflow("basic").nodes_view
+    with pytest.raises(WorkflowValidationError):
+        registry.get_workflow("ui_format")